@@ -1,16 +1,86 @@
+import math
+import random
 import time
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from game import (
-    ROW_COUNT, COL_COUNT, AI_PIECE, HUMAN_PIECE, Board,
-    get_valid_locations, get_next_open_row, drop_piece, is_terminal_node
+    ROW_COUNT, COL_COUNT, EMPTY, AI_PIECE, HUMAN_PIECE, Board,
+    get_valid_locations, get_next_open_row, drop_piece, is_terminal_node,
+    mirror_col, is_symmetric, canonical_key
 )
-from heuristic import BoardEvaluator
+from heuristic import BoardEvaluator, load_weights
+from bitboard import immediate_threats
 
 # --- CONFIGURATION ---
-EVALUATOR = BoardEvaluator()
+# Board size the engine is set up for; change it with set_board_size()
+BOARD_ROWS = ROW_COUNT
+BOARD_COLS = COL_COUNT
+EVAL_CACHE_SIZE = 200000  # Max cached leaf evaluations (0 disables the cache)
+_EVALUATOR: Optional[BoardEvaluator] = None  # Built on first use, see get_evaluator()
 INF = float('inf')
 WIN_SCORE = 10000000.0
 
+# SYMMETRY SETTINGS
+# Mirrored positions have mirrored values, so symmetric positions only need half their columns searched.
+USE_SYMMETRY = True
+# Opening book: root results of early-game searches, shared between a position and its mirror.
+# Key: (canonical position key, algorithm, depth, *book_settings), Value: (score, best column in canonical orientation)
+USE_OPENING_BOOK = True
+OPENING_BOOK: Dict[tuple, Tuple[float, int]] = {}
+BOOK_MAX_PIECES = 8
+
+# MCTS SETTINGS
+# For 'MCTS' the depth K is the playout cutoff (random plies before the 'LITE' evaluation).
+MCTS_TIME_BUDGET = 2.0  # Seconds per move
+STOCHASTIC_ALGORITHMS = ('EXPECTIMINIMAX', 'MCTS')  # Algorithms that model (and play with) slipping pieces
+MCTS_ENGINE = None      # Created on first use; keeps its tree between moves
+MCTS_WORKERS = 1        # > 1 runs root-parallel MCTS across that many processes (no tree reuse)
+
+# THREAT-SPACE SHORTCUTS (Alpha-Beta only; the drop is deterministic there)
+# Early win: a side that can complete a four only searches that move.
+# Forced defence: a single opponent four-completing cell is blocked without spending depth.
+# Off by default: the game only ends on a full board and the side with more fours wins, so
+# these moves are not really forced and the shortcuts can change the root value
+# (benchmark.py forced-moves reports where).
+USE_THREAT_SEARCH = False
+MAX_FORCED_EXTENSIONS = 4  # Per search path, shared with the threat extensions below
+
+# SELECTIVE DEPTH (Alpha-Beta only, each switch independent)
+# Threat extension: a move that makes a new 'three' (BoardEvaluator's three-in-a-row with the
+#   fourth cell empty) leaves the opponent facing a threat, so its reply is searched without spending depth.
+# Late-move reductions: with columns ordered center-out, every column after the first
+#   LMR_FULL_MOVES is searched LMR_REDUCTION plies shallower (nodes with depth >= LMR_MIN_DEPTH).
+# Re-search: a reduced column that still raises alpha (or lowers beta) is searched again at full depth.
+USE_THREAT_EXTENSIONS = False
+USE_LMR = False
+USE_RESEARCH = True
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3
+LMR_REDUCTION = 1
+
+# SPARSE SAMPLING (Expectiminimax only)
+# 0 = exact: every landing column of a chance node is searched and weighted by its probability.
+# k > 0: k landing columns are drawn from get_probabilities (with replacement), each distinct one
+#   is searched once and the k draws are averaged. Fewer subtrees per AI ply buys depth.
+# The draws also give a confidence interval (CONFIDENCE_Z standard errors); a chance node whose
+# half-width exceeds SAMPLE_TOLERANCE searches its remaining landings and uses the exact sum.
+CHANCE_SAMPLES = 0
+SAMPLE_TOLERANCE: Optional[float] = None  # Score units; None never falls back (needs k >= 2 to matter)
+CONFIDENCE_Z = 1.96                       # 95% intervals
+SAMPLING_SEED = 0                         # Reseeded per root search, so a position always gets the same draws
+SAMPLING_RNG = random.Random(SAMPLING_SEED)
+
+# SEARCH KERNEL: Headless Minimax / Alpha-Beta searches without a time budget run in the
+# compiled array kernel (search_kernel.py) when Numba is installed; same scores and nodes.
+# The kernel has no selective depth: LMR and threat extensions keep the Python search.
+USE_SEARCH_KERNEL = True
+_KERNEL = None  # The search_kernel module once imported, False if unavailable (see kernel_available)
+
+# TIME BUDGET: Wall-clock deadline checked at every node (None = unlimited)
+SEARCH_DEADLINE: Optional[float] = None
+
+class SearchTimeout(Exception):
+    """Raised inside the recursion once SEARCH_DEADLINE has passed."""
+
 # VISUALIZATION SETTINGS (FOR CONSOLE ONLY)
 # Level 0 = Root, Level 1 = Human, Level 2 = AI, Level 3 = Leaves
 VISUALIZATION_LIMIT = 3
@@ -18,6 +88,7 @@ VISUALIZATION_LIMIT = 3
 class TreeVisualizer:
     def __init__(self):
         self.nodes_visited = 0
+        self.enabled = True  # False silences the console tree (headless searches)
 
     def _fmt_score(self, score):
         if score == INF: return "+inf"
@@ -31,7 +102,7 @@ class TreeVisualizer:
         return "    " * level
 
     def print_header(self, level, is_maximizing, alpha, beta, use_pruning):
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
 
         indent = self._get_indent(level)
         
@@ -48,7 +119,7 @@ class TreeVisualizer:
 
     def print_scores_summary(self, level, is_leaf_layer, scores):
         """Prints the list of scores from the children."""
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
         
         indent = self._get_indent(level)
         child_depth = level + 1
@@ -60,39 +131,111 @@ class TreeVisualizer:
         print(f"{indent}└── {label}: [ {formatted} ]  (Depth {child_depth})")
 
     def print_selection(self, level, best_col, best_score, is_maximizing):
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
         
         indent = self._get_indent(level)
         tag = "[AI/MAX]" if is_maximizing else "[HU/MIN]"
         print(f"{indent}└── >> {tag} Select Col {self._fmt_col(best_col)} (Val: {self._fmt_score(best_score)})")
 
     def print_prune(self, level, alpha, beta):
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
         indent = self._get_indent(level)
         print(f"{indent}    └── PRUNED (Alpha {self._fmt_score(alpha)} >= Beta {self._fmt_score(beta)})")
 
     def print_chance(self, level, col, math_str):
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
         indent = self._get_indent(level)
         print(f"{indent}├── Chance Node (Col {self._fmt_col(col)}) Depth {level}: {math_str}")
 
     def print_spacer(self, level):
-        if level >= VISUALIZATION_LIMIT: return
+        if not self.enabled or level >= VISUALIZATION_LIMIT: return
         indent = "    " * level
         print(f"{indent}│")
 
 VISUALIZER = TreeVisualizer()
 
+def forced_moves(board: Board, valid_locations: List[int], maximizing_player: bool) -> Tuple[List[int], bool]:
+    """
+    Restricts the columns for the side to move using the immediate-threat detector.
+    Returns (columns, extend): `extend` is True for a single forced defence.
+    - Own four available: only the completing column (early win).
+    - One opponent threat column: only the block (forced move, extended).
+    - Several opponent threat columns: the four cannot be stopped, only blocks are tried (early loss).
+    """
+    ai_cols, human_cols = immediate_threats(board)
+    own, opponent = (ai_cols, human_cols) if maximizing_player else (human_cols, ai_cols)
+    if own:
+        return own[:1], False
+    if len(opponent) == 1:
+        return opponent, True
+    if opponent:
+        return opponent, False
+    return valid_locations, False
+
+def get_evaluator() -> BoardEvaluator:
+    """
+    The shared evaluator, built on first use for the current board size and weights file,
+    so importing ai_agent (menus, tools that never search) stays cheap.
+    """
+    global _EVALUATOR
+    if _EVALUATOR is None:
+        _EVALUATOR = BoardEvaluator(cache_size=EVAL_CACHE_SIZE, rows=BOARD_ROWS, cols=BOARD_COLS, weights=load_weights())
+    return _EVALUATOR
+
+def set_board_size(rows: int, cols: int):
+    """
+    Re-targets the engine at rows x cols boards (e.g. 8x9, 10x12 for stress tests).
+    The evaluator (windows, positional weights) is rebuilt for the new size on next use,
+    and size-specific state is dropped.
+    Boards passed in afterwards must come from create_board(rows, cols).
+    """
+    global BOARD_ROWS, BOARD_COLS, _EVALUATOR, MCTS_ENGINE
+    if rows < 4 or cols < 4:
+        raise ValueError(f"Board must be at least 4x4, got {rows}x{cols}")
+    BOARD_ROWS, BOARD_COLS = rows, cols
+    _EVALUATOR = None
+    OPENING_BOOK.clear()
+    MCTS_ENGINE = None
+
+def kernel_available() -> bool:
+    """True if search_kernel imports (NumPy) and is compiled (Numba)."""
+    global _KERNEL
+    if _KERNEL is None:
+        try:
+            import search_kernel
+            _KERNEL = search_kernel if search_kernel.NUMBA_AVAILABLE else False
+        except ImportError:
+            _KERNEL = False
+    return _KERNEL is not False
+
+def search_columns(board: Board, valid_locations: List[int]) -> List[int]:
+    """Drops the mirrored duplicates of the columns when the position is symmetric."""
+    if USE_SYMMETRY and is_symmetric(board):
+        return [col for col in valid_locations if col <= mirror_col(col, BOARD_COLS)]
+    return valid_locations
+
 # ----------------------------------------------------------------------
 # 1. MINIMAX / ALPHA-BETA
 # ----------------------------------------------------------------------
 
+def selective_depth(new_board: Board, row: int, col: int, piece: int, move_index: int, depth: int,
+                    extensions_left: int) -> Tuple[int, bool, int]:
+    """Search depth of one Alpha-Beta child: (depth, reduced, extensions left)."""
+    if USE_THREAT_EXTENSIONS and extensions_left > 0 and get_evaluator().creates_three(new_board, row, col, piece):
+        return depth, False, extensions_left - 1
+    if USE_LMR and depth >= LMR_MIN_DEPTH and move_index >= LMR_FULL_MOVES:
+        return depth - 1 - LMR_REDUCTION, True, extensions_left
+    return depth - 1, False, extensions_left
+
 def minimax_alphabeta(board: Board, depth: int, alpha: float, beta: float, 
                       maximizing_player: bool, use_pruning: bool, 
                       scoring_mode: str, current_level: int, 
-                      path_id: str, gui_callback=None, gui_depth_limit=3) -> float:
+                      path_id: str, gui_callback=None, gui_depth_limit=3,
+                      extensions_left: int = MAX_FORCED_EXTENSIONS) -> float:
     
     VISUALIZER.nodes_visited += 1
+    if SEARCH_DEADLINE is not None and time.time() > SEARCH_DEADLINE:
+        raise SearchTimeout()
     is_terminal = is_terminal_node(board)
     
     # --- GUI UPDATE: NODE VISIT ---
@@ -110,18 +253,26 @@ def minimax_alphabeta(board: Board, depth: int, alpha: float, beta: float,
     # --- BASE CASE ---
     if depth == 0 or is_terminal:
         if is_terminal:
-            score = EVALUATOR.evaluate(board, scoring_mode=scoring_mode)
+            score = get_evaluator().evaluate(board, scoring_mode=scoring_mode)
             if score >= 10000: final = WIN_SCORE 
             elif score <= -10000: final = -WIN_SCORE
             else: final = 0.0
         else:
-            final = EVALUATOR.evaluate(board, scoring_mode=scoring_mode)
+            final = get_evaluator().evaluate(board, scoring_mode=scoring_mode)
         
         if gui_callback and current_level <= gui_depth_limit:
             gui_callback({'type': 'return', 'id': path_id, 'score': final})
         return final
 
     valid_locations = get_valid_locations(board)
+    if use_pruning and USE_THREAT_SEARCH:
+        valid_locations, extend = forced_moves(board, valid_locations, maximizing_player)
+        if extend and extensions_left > 0:
+            depth += 1  # Forced reply: search it without spending depth
+            extensions_left -= 1
+    valid_locations = search_columns(board, valid_locations)
+    if use_pruning and USE_LMR:
+        valid_locations = sorted(valid_locations, key=lambda col: abs(2 * col - (BOARD_COLS - 1)))  # Center first
     next_is_leaf = (depth == 1)
 
     # --- CONSOLE VIS ---
@@ -141,7 +292,13 @@ def minimax_alphabeta(board: Board, depth: int, alpha: float, beta: float,
             
             # Recurse
             child_id = f"{path_id}.{i}"
-            score = minimax_alphabeta(new_board, depth - 1, alpha, beta, False, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit)
+            if use_pruning:
+                child_depth, reduced, child_extensions = selective_depth(new_board, row, col, AI_PIECE, i, depth, extensions_left)
+            else:
+                child_depth, reduced, child_extensions = depth - 1, False, extensions_left
+            score = minimax_alphabeta(new_board, child_depth, alpha, beta, False, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit, child_extensions)
+            if reduced and USE_RESEARCH and score > alpha:
+                score = minimax_alphabeta(new_board, depth - 1, alpha, beta, False, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit, child_extensions)
             scores.append(score)
 
             if score > value:
@@ -182,7 +339,13 @@ def minimax_alphabeta(board: Board, depth: int, alpha: float, beta: float,
             
             # Recurse
             child_id = f"{path_id}.{i}"
-            score = minimax_alphabeta(new_board, depth - 1, alpha, beta, True, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit)
+            if use_pruning:
+                child_depth, reduced, child_extensions = selective_depth(new_board, row, col, HUMAN_PIECE, i, depth, extensions_left)
+            else:
+                child_depth, reduced, child_extensions = depth - 1, False, extensions_left
+            score = minimax_alphabeta(new_board, child_depth, alpha, beta, True, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit, child_extensions)
+            if reduced and USE_RESEARCH and score < beta:
+                score = minimax_alphabeta(new_board, depth - 1, alpha, beta, True, use_pruning, scoring_mode, current_level + 1, child_id, gui_callback, gui_depth_limit, child_extensions)
             scores.append(score)
 
             if score < value:
@@ -218,11 +381,28 @@ def minimax_alphabeta(board: Board, depth: int, alpha: float, beta: float,
 
 def get_probabilities(col: int) -> list:
     if col == 0: return [(0.6, 0), (0.4, 1)]
-    elif col == COL_COUNT - 1: return [(0.4, col - 1), (0.6, col)]
+    elif col == BOARD_COLS - 1: return [(0.4, col - 1), (0.6, col)]
     else: return [(0.2, col - 1), (0.6, col), (0.2, col + 1)]
 
+def roll_landing_col(intended_col: int, rand: float) -> int:
+    """Maps a uniform random number in [0, 1) to the landing column of a stochastic drop."""
+    cumulative_prob = 0.0
+    for prob, final_col in get_probabilities(intended_col):
+        cumulative_prob += prob
+        if rand < cumulative_prob:
+            return final_col
+    return intended_col
+
 def calculate_chance_node(board: Board, depth: int, intended_col: int, current_level: int, path_id: str, gui_callback=None, gui_depth_limit=3) -> float:
+    return chance_node_interval(board, depth, intended_col, current_level, path_id, gui_callback, gui_depth_limit)[0]
+
+def chance_node_interval(board: Board, depth: int, intended_col: int, current_level: int, path_id: str, gui_callback=None, gui_depth_limit=3) -> Tuple[float, float]:
+    """
+    Returns (expected value, confidence half-width). The half-width is 0 for an exact
+    expectation and covers only this node's own draws, not the sampling below it.
+    """
     expected_value = 0.0
+    half_width = 0.0
     probabilities = get_probabilities(intended_col)
     math_parts = []
     
@@ -230,6 +410,10 @@ def calculate_chance_node(board: Board, depth: int, intended_col: int, current_l
     if gui_callback and current_level <= gui_depth_limit:
         gui_callback({'type': 'visit', 'id': path_id, 'level': current_level, 'maximizing': True, 'node_type': 'chance'})
 
+    if CHANCE_SAMPLES:
+        expected_value, half_width, math_parts = _sampled_expectation(board, depth, probabilities, current_level, path_id, gui_callback, gui_depth_limit)
+        probabilities = []  # Skip the exact sum below
+
     for i, (prob, final_col) in enumerate(probabilities):
         row = get_next_open_row(board, final_col)
         if row is not None:
@@ -250,17 +434,63 @@ def calculate_chance_node(board: Board, depth: int, intended_col: int, current_l
     if gui_callback and current_level <= gui_depth_limit:
         gui_callback({'type': 'return', 'id': path_id, 'score': expected_value})
         
-    return expected_value
+    return expected_value, half_width
+
+def _sampled_expectation(board: Board, depth: int, probabilities: list, current_level: int, path_id: str,
+                         gui_callback, gui_depth_limit) -> Tuple[float, float, List[str]]:
+    """Sparse sampling of one chance node. Returns (estimate, half-width, console math parts)."""
+    values: Dict[int, float] = {}
+
+    def outcome(i: int) -> float:
+        # Each landing column is searched at most once, however often it is drawn
+        if i not in values:
+            final_col = probabilities[i][1]
+            row = get_next_open_row(board, final_col)
+            if row is not None:
+                new_board = drop_piece(board, row, final_col, AI_PIECE)
+                values[i] = expectiminimax(new_board, depth, False, current_level + 1, f"{path_id}.{i}", gui_callback, gui_depth_limit)
+            else:
+                values[i] = -WIN_SCORE * 0.5
+        return values[i]
+
+    draws = []
+    for _ in range(CHANCE_SAMPLES):
+        rand, cumulative_prob, drawn = SAMPLING_RNG.random(), 0.0, len(probabilities) - 1
+        for i, (prob, _) in enumerate(probabilities):
+            cumulative_prob += prob
+            if rand < cumulative_prob:
+                drawn = i
+                break
+        draws.append(outcome(drawn))
+
+    n = len(draws)
+    estimate = sum(draws) / n
+    if n > 1:
+        variance = sum((d - estimate) ** 2 for d in draws) / (n - 1)
+        half_width = CONFIDENCE_Z * math.sqrt(variance / n)
+    else:
+        half_width = INF  # One draw says nothing about the spread
+
+    exact = len(values) == len(probabilities)  # Every landing was drawn: the exact sum is free
+    if not exact and SAMPLE_TOLERANCE is not None and half_width > SAMPLE_TOLERANCE:
+        exact = True
+    if exact:
+        estimate = sum(prob * outcome(i) for i, (prob, _) in enumerate(probabilities))
+        half_width = 0.0
+        return estimate, half_width, [f"{prob}*{values[i]:.0f}" for i, (prob, _) in enumerate(probabilities)]
+    return estimate, half_width, [f"mean({', '.join(f'{d:.0f}' for d in draws)}) +-{half_width:.0f}"]
 
 def expectiminimax(board: Board, depth: int, is_maximizing: bool, current_level: int, path_id: str = "root", gui_callback=None, gui_depth_limit=3) -> float:
     VISUALIZER.nodes_visited += 1
+    if SEARCH_DEADLINE is not None and time.time() > SEARCH_DEADLINE:
+        raise SearchTimeout()
     is_terminal = is_terminal_node(board)
     
     if gui_callback and current_level <= gui_depth_limit:
         gui_callback({'type': 'visit', 'id': path_id, 'level': current_level, 'maximizing': is_maximizing, 'alpha': -INF, 'beta': INF})
 
     if depth == 0 or is_terminal:
-        score = EVALUATOR.evaluate(board, scoring_mode='LITE')
+        score = get_evaluator().evaluate(board, scoring_mode='LITE')
         if score >= 10000: final = WIN_SCORE 
         elif score <= -10000: final = -WIN_SCORE 
         else: final = score
@@ -268,7 +498,7 @@ def expectiminimax(board: Board, depth: int, is_maximizing: bool, current_level:
             gui_callback({'type': 'return', 'id': path_id, 'score': final})
         return final
 
-    valid_locations = get_valid_locations(board)
+    valid_locations = search_columns(board, get_valid_locations(board))
     next_is_leaf = (depth == 1)
 
     if is_maximizing:
@@ -322,23 +552,119 @@ def expectiminimax(board: Board, depth: int, is_maximizing: bool, current_level:
 # 3. MAIN WRAPPER
 # ----------------------------------------------------------------------
 
-def find_best_move(board: Board, algorithm: str, depth: int, gui_callback=None, gui_depth_limit=3) -> Tuple[float, int, float]:
-    print("\n" + "="*60)
-    print(f"  SEARCH: {algorithm:<25} DEPTH: {depth}")
-    print(f"  VISUALIZATION LIMIT: Top {VISUALIZATION_LIMIT} Levels (Console)")
-    print("="*60 + "\n")
+def _silent(*args, **kwargs):
+    pass
+
+def find_best_move(board: Board, algorithm: str, depth: int, gui_callback=None, gui_depth_limit=3, verbose: bool = True,
+                   time_budget: Optional[float] = None) -> Tuple[float, int, float]:
+    """
+    Searches the root position. verbose=False runs headless (no banners, no console tree).
+    time_budget (seconds) only applies to 'MCTS', which defaults to MCTS_TIME_BUDGET.
+    """
+    log = print if verbose else _silent
+    if algorithm == 'MCTS':
+        return _find_best_move_mcts(board, depth, time_budget or MCTS_TIME_BUDGET, gui_callback, log)
+    previous = VISUALIZER.enabled
+    VISUALIZER.enabled = verbose
+    try:
+        return _find_best_move(board, algorithm, depth, gui_callback, gui_depth_limit, log)
+    finally:
+        VISUALIZER.enabled = previous
+
+def find_best_move_timed(board: Board, algorithm: str, time_budget: float, max_depth: Optional[int] = None,
+                         verbose: bool = False) -> Tuple[float, int, float, int]:
+    """
+    Iterative deepening under a wall-clock budget (seconds); max_depth defaults to the
+    number of cells of the current board size.
+    Returns (score, col, elapsed, depth) from the deepest search that finished in time.
+    For 'MCTS' the last value is the number of playouts run instead.
+    """
+    global SEARCH_DEADLINE
+    if max_depth is None:
+        max_depth = BOARD_ROWS * BOARD_COLS
+    if algorithm == 'MCTS':
+        # Anytime by construction: spend the whole budget on playouts
+        score, col, elapsed = find_best_move(board, algorithm, min(max_depth, 8), verbose=verbose, time_budget=time_budget)
+        return score, col, elapsed, VISUALIZER.nodes_visited
+
+    start_time = time.time()
+    empty_cells = sum(row.count(EMPTY) for row in board)
+    result = None
+
+    SEARCH_DEADLINE = start_time + time_budget
+    try:
+        for depth in range(1, min(max_depth, empty_cells) + 1):
+            try:
+                score, col, _ = find_best_move(board, algorithm, depth, verbose=verbose)
+            except SearchTimeout:
+                break
+            result = (score, col, depth)
+    finally:
+        SEARCH_DEADLINE = None
+
+    if result is None:
+        # Budget too small for even one ply: a depth-1 search is always affordable
+        score, col, _ = find_best_move(board, algorithm, 1, verbose=verbose)
+        result = (score, col, 1)
+
+    score, col, depth = result
+    return score, col, time.time() - start_time, depth
+
+def book_settings(algorithm: str) -> tuple:
+    """Module switches that change the root result of `algorithm` (part of the opening-book key)."""
+    if algorithm == 'MINIMAX_ALPHA_BETA':
+        return (USE_THREAT_SEARCH, USE_LMR, USE_RESEARCH, USE_THREAT_EXTENSIONS)
+    if algorithm == 'EXPECTIMINIMAX':
+        return (CHANCE_SAMPLES, SAMPLE_TOLERANCE)
+    return ()
+
+def _find_best_move(board: Board, algorithm: str, depth: int, gui_callback, gui_depth_limit, log) -> Tuple[float, int, float]:
+    log("\n" + "="*60)
+    log(f"  SEARCH: {algorithm:<25} DEPTH: {depth}")
+    log(f"  VISUALIZATION LIMIT: Top {VISUALIZATION_LIMIT} Levels (Console)")
+    log("="*60 + "\n")
     
     start_time = time.time()
     VISUALIZER.nodes_visited = 0
+    cache = get_evaluator().cache
+    if cache is not None:
+        cache.reset_stats()
+
+    # --- OPENING BOOK (Shared with the mirrored position) ---
+    position_key, mirrored = canonical_key(board)
+    book_key = (position_key, algorithm, depth) + book_settings(algorithm)
+    use_book = USE_OPENING_BOOK and gui_callback is None and sum(row.count(EMPTY) for row in board) >= BOARD_ROWS * BOARD_COLS - BOOK_MAX_PIECES
+    if use_book and book_key in OPENING_BOOK:
+        best_score, book_col = OPENING_BOOK[book_key]
+        best_col = mirror_col(book_col, BOARD_COLS) if mirrored else book_col
+        elapsed_time = time.time() - start_time
+        log(f"   >> BOOK MOVE: Column {best_col + 1}  |  SCORE: {best_score:.0f}\n")
+        return best_score, best_col, elapsed_time
     
     valid_locations = get_valid_locations(board)
     best_score = -INF
     best_col = valid_locations[0]
+    symmetric = USE_SYMMETRY and is_symmetric(board)
+    root_scores: Dict[int, float] = {}
+    SAMPLING_RNG.seed(SAMPLING_SEED)
     
     scoring_mode = 'LITE' if algorithm == 'EXPECTIMINIMAX' else 'FULL'
     use_pruning = True if algorithm == 'MINIMAX_ALPHA_BETA' else False
+    if use_pruning and USE_THREAT_SEARCH:
+        valid_locations, _ = forced_moves(board, valid_locations, True)
+        best_col = valid_locations[0]
 
-    print("[AI/MAX] AI Thinking (Depth 0)...")
+    # Headless minimax without a deadline: all root children in one kernel call
+    kernel_scores: Dict[int, float] = {}
+    if (algorithm != 'EXPECTIMINIMAX' and USE_SEARCH_KERNEL and gui_callback is None and not VISUALIZER.enabled
+            and SEARCH_DEADLINE is None and not (use_pruning and (USE_LMR or USE_THREAT_EXTENSIONS)) and kernel_available()):
+        searched = search_columns(board, valid_locations)
+        scores, nodes = _KERNEL.score_columns(board, searched, depth - 1, use_pruning, USE_THREAT_SEARCH, USE_SYMMETRY,
+                                              MAX_FORCED_EXTENSIONS, WIN_SCORE, get_evaluator())
+        kernel_scores = dict(zip(searched, scores))
+        VISUALIZER.nodes_visited += nodes
+
+    log("[AI/MAX] AI Thinking (Depth 0)...")
     
     # GUI: Initialize Root
     if gui_callback:
@@ -349,15 +675,25 @@ def find_best_move(board: Board, algorithm: str, depth: int, gui_callback=None,
         new_board = drop_piece(board, row, col, AI_PIECE)
         
         child_id = f"root.{i}"
+        half_width = 0.0  # Confidence half-width of a sampled root chance node
         
-        if algorithm == 'EXPECTIMINIMAX':
-             score = calculate_chance_node(board, depth - 1, col, 0, child_id, gui_callback, gui_depth_limit)
+        if symmetric and mirror_col(col, BOARD_COLS) in root_scores:
+            # Mirror image of a column already searched: same value
+            score = root_scores[mirror_col(col, BOARD_COLS)]
+            if gui_callback:
+                gui_callback({'type': 'visit', 'id': child_id, 'level': 1, 'maximizing': algorithm == 'EXPECTIMINIMAX'})
+                gui_callback({'type': 'return', 'id': child_id, 'score': score})
+        elif col in kernel_scores:
+            score = kernel_scores[col]
+        elif algorithm == 'EXPECTIMINIMAX':
+             score, half_width = chance_node_interval(board, depth - 1, col, 0, child_id, gui_callback, gui_depth_limit)
         else:
             score = minimax_alphabeta(new_board, depth - 1, -INF, INF, False, use_pruning, scoring_mode, 1, child_id, gui_callback, gui_depth_limit)
+        root_scores[col] = score
         
-        print("") 
-        print("│")
-        print(f"├── [AI/MAX] Option Col {col + 1} -> Score: {score:.1f}")
+        log("") 
+        log("│")
+        log(f"├── [AI/MAX] Option Col {col + 1} -> Score: {score:.1f}" + (f" +-{half_width:.0f}" if half_width else ""))
         
         if score > best_score:
             best_score = score
@@ -370,13 +706,58 @@ def find_best_move(board: Board, algorithm: str, depth: int, gui_callback=None,
     if gui_callback:
         gui_callback({'type': 'return', 'id': 'root', 'score': best_score})
 
+    if use_book:
+        OPENING_BOOK[book_key] = (best_score, mirror_col(best_col, BOARD_COLS) if mirrored else best_col)
+
     end_time = time.time()
     elapsed_time = end_time - start_time
     
-    print("\n" + "-"*60)
-    print(f"   >> BEST MOVE: Column {best_col + 1}")
-    print(f"   >> SCORE: {best_score:.0f}")
-    print(f"   >> TIME: {elapsed_time:.4f}s  |  NODES: {VISUALIZER.nodes_visited}")
-    print("-" * 60 + "\n")
+    log("\n" + "-"*60)
+    log(f"   >> BEST MOVE: Column {best_col + 1}")
+    log(f"   >> SCORE: {best_score:.0f}")
+    log(f"   >> TIME: {elapsed_time:.4f}s  |  NODES: {VISUALIZER.nodes_visited}")
+    if cache is not None:
+        log(f"   >> EVAL CACHE: {cache.hits} hits / {cache.misses} misses ({cache.hit_rate:.1%})")
+    log("-" * 60 + "\n")
     
+    return best_score, best_col, elapsed_time
+
+def _find_best_move_mcts(board: Board, cutoff_depth: int, time_budget: float, gui_callback, log) -> Tuple[float, int, float]:
+    """MCTS root: score is the AI's expected result in percent (100 = certain win)."""
+    global MCTS_ENGINE
+    from mcts import MCTS, root_parallel_search  # Deferred: mcts imports this module
+
+    log("\n" + "="*60)
+    log(f"  SEARCH: {'MCTS':<25} CUTOFF: {cutoff_depth}  BUDGET: {time_budget:.1f}s")
+    log("="*60 + "\n")
+
+    start_time = time.time()
+    if MCTS_WORKERS > 1:
+        reward, best_col, root_stats, playouts = root_parallel_search(board, time_budget, MCTS_WORKERS, cutoff_depth)
+    else:
+        if MCTS_ENGINE is None:
+            MCTS_ENGINE = MCTS(cutoff_depth=cutoff_depth)
+        MCTS_ENGINE.cutoff_depth = cutoff_depth
+        reward, best_col = MCTS_ENGINE.search(board, time_budget)
+        root_stats, playouts = MCTS_ENGINE.root_statistics(), MCTS_ENGINE.playouts
+    best_score = reward * 100
+    VISUALIZER.nodes_visited = playouts
+
+    if gui_callback:
+        gui_callback({'type': 'visit', 'id': 'root', 'level': 0, 'maximizing': True, 'alpha': -INF, 'beta': INF, 'score': None})
+    for i, (col, visits, mean) in enumerate(root_stats):
+        log(f"├── [AI/MAX] Option Col {col + 1} -> Score: {mean * 100:.1f}  (Visits: {visits})")
+        if gui_callback:
+            gui_callback({'type': 'visit', 'id': f"root.{i}", 'level': 1, 'maximizing': True, 'node_type': 'chance'})
+            gui_callback({'type': 'return', 'id': f"root.{i}", 'score': round(mean * 100)})
+    if gui_callback:
+        gui_callback({'type': 'return', 'id': 'root', 'score': round(best_score)})
+
+    elapsed_time = time.time() - start_time
+    log("\n" + "-"*60)
+    log(f"   >> BEST MOVE: Column {best_col + 1}")
+    log(f"   >> SCORE: {best_score:.0f}% expected")
+    log(f"   >> TIME: {elapsed_time:.4f}s  |  PLAYOUTS: {playouts}  |  WORKERS: {MCTS_WORKERS}")
+    log("-" * 60 + "\n")
+
     return best_score, best_col, elapsed_time
\ No newline at end of file
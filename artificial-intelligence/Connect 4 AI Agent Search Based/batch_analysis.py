@@ -0,0 +1,106 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+from multiprocessing import Pool
+from typing import Iterator, Optional, Set, Tuple
+from game import board_from_string, is_terminal_node
+import ai_agent
+
+# ----------------------------------------------------------------------
+# BATCH POSITION ANALYSIS
+# ----------------------------------------------------------------------
+# Input: one position per line in the board_to_string encoding
+#   (7 digits per row, rows top to bottom separated by '/', 0 = empty, 1 = Human, 2 = AI).
+#   Blank lines and lines starting with '#' are skipped. The AI is always the side to move.
+# Output: JSON lines, one per analysed position, written as soon as each result arrives:
+#   {"line": 12, "position": "...", "col": 3, "score": 41.0, "depth": 5, "nodes": 1877, "elapsed": 0.21}
+# Results arrive out of order; "line" (1-based) ties each one back to the input.
+
+BATCH_SIZE = 256  # Positions in flight at once, so memory stays flat on huge inputs
+
+def read_positions(path: str, done: Set[int]) -> Iterator[Tuple[int, str]]:
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, start=1):
+            text = line.strip()
+            if not text or text.startswith("#") or line_no in done:
+                continue
+            yield line_no, text
+
+def load_finished(path: str) -> Set[int]:
+    """
+    Collects the input line numbers already present in an output file.
+    A partially written last line (from an interruption) is truncated away.
+    """
+    done: Set[int] = set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        done.add(json.loads(line)["line"])
+    return done
+
+def analyse(job: Tuple[int, str, str, int, Optional[float]]) -> dict:
+    line_no, text, algorithm, depth, time_budget = job
+    result = {'line': line_no, 'position': text}
+    try:
+        board = board_from_string(text)
+    except ValueError as e:
+        result['error'] = str(e)
+        return result
+    if is_terminal_node(board):
+        result['error'] = "board is full"
+        return result
+
+    if time_budget is None:
+        score, col, elapsed = ai_agent.find_best_move(board, algorithm, depth, verbose=False)
+        reached = depth
+    else:
+        score, col, elapsed, reached = ai_agent.find_best_move_timed(board, algorithm, time_budget, depth)
+    result.update(col=col, score=score, depth=reached, nodes=ai_agent.VISUALIZER.nodes_visited, elapsed=round(elapsed, 4))
+    return result
+
+def run_batch(args) -> int:
+    done: Set[int] = set()
+    if os.path.exists(args.output):
+        if not args.resume:
+            print(f"{args.output} already exists (use --resume to continue it)", file=sys.stderr)
+            return 1
+        done = load_finished(args.output)
+        print(f"Resuming: {len(done)} positions already analysed", file=sys.stderr)
+
+    jobs = ((line_no, text, args.algorithm, args.depth, args.time) for line_no, text in read_positions(args.input, done))
+    written = failed = 0
+    with open(args.output, "a") as out, Pool(args.workers) as pool:
+        while True:
+            batch = list(itertools.islice(jobs, BATCH_SIZE))
+            if not batch:
+                break
+            for result in pool.imap_unordered(analyse, batch, chunksize=args.chunksize):
+                out.write(json.dumps(result) + "\n")
+                out.flush()  # Every finished result survives an interruption
+                written += 1
+                failed += 'error' in result
+            print(f"  {len(done) + written} positions analysed", end="\r", file=sys.stderr)
+
+    print(f"\nDone: {written} new results ({failed} errors) -> {args.output}", file=sys.stderr)
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse a file of Connect 4 positions across all cores")
+    parser.add_argument('input', help="Positions, one board string per line")
+    parser.add_argument('output', help="JSON-lines results file")
+    parser.add_argument('--algorithm', default='MINIMAX_ALPHA_BETA',
+                        choices=['MINIMAX_NO_PRUNING', 'MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX', 'MCTS'])
+    parser.add_argument('--depth', type=int, default=5, help="Search depth (the depth cap when --time is given)")
+    parser.add_argument('--time', type=float, help="Per-position time budget in seconds (iterative deepening)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunksize', type=int, default=4)
+    parser.add_argument('--resume', action='store_true', help="Append to an existing output, skipping finished lines")
+    sys.exit(run_batch(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,649 @@
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import Dict, List, Tuple
+from game import (
+    ROW_COUNT, COL_COUNT, AI_PIECE, HUMAN_PIECE, Board,
+    create_board, get_valid_locations, get_next_open_row, drop_piece, check_final_score
+)
+from heuristic import EvaluationCache
+import ai_agent
+
+# Benchmarks measure search, so repeated positions must not be answered from the book
+ai_agent.USE_OPENING_BOOK = False
+
+# ----------------------------------------------------------------------
+# BENCHMARK CORPUS
+# ----------------------------------------------------------------------
+
+# Opening positions as move sequences (0-based columns, Human moves first).
+# Every sequence has an even length, so the AI is always to move.
+BENCHMARK_POSITIONS = [
+    "",
+    "33",
+    "3243",
+    "332254",
+    "33224411",
+    "3342251660",
+]
+
+def position_from_moves(moves: str, rows: int = ROW_COUNT, cols: int = COL_COUNT) -> Board:
+    """Replays a move sequence (Human first, alternating) onto an empty board."""
+    board = create_board(rows, cols)
+    piece = HUMAN_PIECE
+    for ch in moves:
+        col = int(ch)
+        board = drop_piece(board, get_next_open_row(board, col), col, piece)
+        piece = AI_PIECE if piece == HUMAN_PIECE else HUMAN_PIECE
+    return board
+
+def quiet_search(board: Board, algorithm: str, depth: int) -> Tuple[float, int, float]:
+    """Runs find_best_move with the console tree output discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ai_agent.find_best_move(board, algorithm, depth)
+
+# ----------------------------------------------------------------------
+# 1. EVALUATION CACHE
+# ----------------------------------------------------------------------
+
+def bench_eval_cache(algorithms: List[str], depths: List[int], cache_size: int):
+    print(f"{'ALGORITHM':<20} {'DEPTH':>5} {'NO CACHE':>10} {'CACHE':>10} {'SPEEDUP':>8} {'HIT RATE':>9}")
+    boards = [position_from_moves(m) for m in BENCHMARK_POSITIONS]
+    evaluator = ai_agent.get_evaluator()
+    saved_cache = evaluator.cache
+
+    for algorithm in algorithms:
+        for depth in depths:
+            evaluator.cache = None
+            start = time.perf_counter()
+            baseline = [quiet_search(b, algorithm, depth)[:2] for b in boards]
+            uncached_time = time.perf_counter() - start
+
+            # A fresh cache per run, so hits only come from within the corpus
+            cache = EvaluationCache(cache_size)
+            evaluator.cache = cache
+            hits = misses = 0
+            start = time.perf_counter()
+            cached = []
+            for b in boards:
+                cached.append(quiet_search(b, algorithm, depth)[:2])
+                hits += cache.hits
+                misses += cache.misses
+            cached_time = time.perf_counter() - start
+
+            assert cached == baseline, "Cached search changed the result"
+            hit_rate = hits / (hits + misses) if hits + misses else 0.0
+            print(f"{algorithm:<20} {depth:>5} {uncached_time:>9.2f}s {cached_time:>9.2f}s "
+                  f"{uncached_time / cached_time:>7.2f}x {hit_rate:>8.1%}")
+
+    evaluator.cache = saved_cache
+
+# ----------------------------------------------------------------------
+# 2. SYMMETRY REDUCTION
+# ----------------------------------------------------------------------
+
+def bench_symmetry(algorithms: List[str], depth: int):
+    print(f"{'ALGORITHM':<20} {'POSITION':<12} {'NODES':>9} {'NODES (SYM)':>12} {'TIME':>8} {'TIME (SYM)':>11}")
+    saved = ai_agent.USE_SYMMETRY
+
+    for algorithm in algorithms:
+        for moves in BENCHMARK_POSITIONS:
+            board = position_from_moves(moves)
+            runs = []
+            for use_symmetry in (False, True):
+                ai_agent.USE_SYMMETRY = use_symmetry
+                if ai_agent.get_evaluator().cache is not None:
+                    ai_agent.get_evaluator().cache.clear()
+                score, col, elapsed = quiet_search(board, algorithm, depth)
+                runs.append((score, ai_agent.VISUALIZER.nodes_visited, elapsed))
+
+            assert runs[0][0] == runs[1][0], "Symmetry reduction changed the root value"
+            print(f"{algorithm:<20} {moves or '(empty)':<12} {runs[0][1]:>9} {runs[1][1]:>12} "
+                  f"{runs[0][2]:>7.2f}s {runs[1][2]:>10.2f}s")
+
+    ai_agent.USE_SYMMETRY = saved
+
+# ----------------------------------------------------------------------
+# 3. PARALLEL MCTS THROUGHPUT
+# ----------------------------------------------------------------------
+
+def bench_mcts_throughput(workers_list: List[int], time_budget: float, cutoff_depth: int, playout: str):
+    from mcts import MCTS, TreeParallelMCTS, root_parallel_search
+    board = position_from_moves("3243")
+    print(f"{'VARIANT':<15} {'WORKERS':>7} {'PLAYOUTS':>9} {'PLAYOUTS/S':>11} {'SPEEDUP':>8} {'MOVE':>5}")
+
+    start = time.perf_counter()
+    engine = MCTS(playout=playout, cutoff_depth=cutoff_depth, seed=0)
+    _, col = engine.search(board, time_budget)
+    base_rate = engine.playouts / (time.perf_counter() - start)
+    print(f"{'sequential':<15} {1:>7} {engine.playouts:>9} {base_rate:>11.0f} {1.0:>7.2f}x {col + 1:>5}")
+
+    for workers in workers_list:
+        start = time.perf_counter()
+        _, col, _, playouts = root_parallel_search(board, time_budget, workers, cutoff_depth, playout)
+        rate = playouts / (time.perf_counter() - start)  # Includes process start-up
+        print(f"{'root-parallel':<15} {workers:>7} {playouts:>9} {rate:>11.0f} {rate / base_rate:>7.2f}x {col + 1:>5}")
+
+    for workers in workers_list:
+        engine = TreeParallelMCTS(playout=playout, cutoff_depth=cutoff_depth, seed=0)
+        start = time.perf_counter()
+        _, col = engine.search(board, time_budget, workers=workers)
+        rate = engine.playouts / (time.perf_counter() - start)
+        print(f"{'tree-parallel':<15} {workers:>7} {engine.playouts:>9} {rate:>11.0f} {rate / base_rate:>7.2f}x {col + 1:>5}")
+
+# ----------------------------------------------------------------------
+# 4. FORCED MOVES (THREAT SEARCH)
+# ----------------------------------------------------------------------
+
+# Tactical positions: an AI four to complete, single and double Human threats
+TACTICAL_POSITIONS = [
+    "606162",
+    "001122",
+    "00112265",
+    "3344225566",
+    "2233445511",
+]
+
+def bench_forced_moves(depth: int):
+    print(f"{'POSITION':<12} {'THREATS (AI / HUMAN)':<22} {'NODES':>9} {'NODES (FORCED)':>15} {'TIME':>8} {'TIME (FORCED)':>14} {'MOVE':>9}  VALUE")
+    saved = ai_agent.USE_THREAT_SEARCH
+    from bitboard import immediate_threats
+    changed = []
+
+    for moves in TACTICAL_POSITIONS + BENCHMARK_POSITIONS:
+        board = position_from_moves(moves)
+        runs = []
+        for use_threats in (False, True):
+            ai_agent.USE_THREAT_SEARCH = use_threats
+            if ai_agent.get_evaluator().cache is not None:
+                ai_agent.get_evaluator().cache.clear()
+            score, col, elapsed = quiet_search(board, 'MINIMAX_ALPHA_BETA', depth)
+            runs.append((col, ai_agent.VISUALIZER.nodes_visited, elapsed, score))
+
+        ai_cols, human_cols = immediate_threats(board)
+        threats = f"{[c + 1 for c in ai_cols]} / {[c + 1 for c in human_cols]}"
+        same = runs[0][3] == runs[1][3] and runs[0][0] == runs[1][0]
+        if not same:
+            changed.append(moves)
+        print(f"{moves or '(empty)':<12} {threats:<22} {runs[0][1]:>9} {runs[1][1]:>15} "
+              f"{runs[0][2]:>7.2f}s {runs[1][2]:>13.2f}s {runs[0][0] + 1:>4} -> {runs[1][0] + 1}  "
+              f"{'same' if same else f'{runs[0][3]:g} -> {runs[1][3]:g}'}")
+
+    ai_agent.USE_THREAT_SEARCH = saved
+    if changed:
+        print(f"\nRoot value or move differs with the shortcuts on ({', '.join(changed)}): "
+              f"they are not exact under these rules, keep USE_THREAT_SEARCH off for exact play")
+    else:
+        print("\nRoot values and moves match with the shortcuts off and on")
+
+# ----------------------------------------------------------------------
+# 5. FINAL SCORE COUNTING
+# ----------------------------------------------------------------------
+
+def random_full_board(rng: random.Random) -> Board:
+    """A full board with an equal number of pieces per player, shuffled."""
+    cells = [HUMAN_PIECE, AI_PIECE] * (ROW_COUNT * COL_COUNT // 2)
+    rng.shuffle(cells)
+    return [cells[r * COL_COUNT:(r + 1) * COL_COUNT] for r in range(ROW_COUNT)]
+
+def bench_final_score(count: int, seed: int):
+    from bitboard import count_fours, count_fours_batch
+    rng = random.Random(seed)
+    boards = [random_full_board(rng) for _ in range(count)]
+
+    start = time.perf_counter()
+    reference = [(check_final_score(b, AI_PIECE), check_final_score(b, HUMAN_PIECE)) for b in boards]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bitmask = [count_fours(b) for b in boards]
+    bitmask_time = time.perf_counter() - start
+    assert bitmask == reference, "Bitmask scorer disagrees with check_final_score"
+
+    print(f"{'SCORER':<20} {'BOARDS':>8} {'TIME':>9} {'BOARDS/S':>11} {'SPEEDUP':>8}")
+    print(f"{'check_final_score':<20} {count:>8} {reference_time:>8.3f}s {count / reference_time:>11.0f} {1.0:>7.2f}x")
+    print(f"{'count_fours':<20} {count:>8} {bitmask_time:>8.3f}s {count / bitmask_time:>11.0f} {reference_time / bitmask_time:>7.2f}x")
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("NumPy not installed: batch scorer skipped")
+        return
+    array = np.array(boards, dtype=np.int8)
+    start = time.perf_counter()
+    batch = count_fours_batch(array)
+    batch_time = time.perf_counter() - start
+    assert [tuple(row) for row in batch.tolist()] == reference, "Batch scorer disagrees with check_final_score"
+    print(f"{'count_fours_batch':<20} {count:>8} {batch_time:>8.3f}s {count / batch_time:>11.0f} {reference_time / batch_time:>7.2f}x")
+
+# ----------------------------------------------------------------------
+# 6. BOARD SIZE SCALING
+# ----------------------------------------------------------------------
+
+def bench_board_size(sizes: List[Tuple[int, int]], depths: List[int]):
+    from bitboard import count_fours
+    print(f"{'SIZE':<7} {'WINDOWS':>7} {'EVAL/S':>8} {'DEPTH':>5} {'NODES':>9} {'TIME':>8} {'US/NODE':>8} {'MOVE':>5}")
+    for rows, cols in sizes:
+        ai_agent.set_board_size(rows, cols)
+        center = str(cols // 2)
+        board = position_from_moves(center * 2, rows, cols)
+
+        # Leaf cost: one uncached evaluation and one final-score count
+        evaluator = ai_agent.get_evaluator()
+        evaluator.cache = None
+        start = time.perf_counter()
+        for _ in range(2000):
+            evaluator.evaluate(board)
+            count_fours(board)
+        eval_rate = 2000 / (time.perf_counter() - start)
+        evaluator.cache = EvaluationCache(ai_agent.EVAL_CACHE_SIZE)
+
+        for depth in depths:
+            evaluator.cache.clear()
+            score, col, elapsed = quiet_search(board, 'MINIMAX_ALPHA_BETA', depth)
+            nodes = ai_agent.VISUALIZER.nodes_visited
+            print(f"{f'{rows}x{cols}':<7} {len(evaluator.window_indices):>7} {eval_rate:>8.0f} {depth:>5} "
+                  f"{nodes:>9} {elapsed:>7.2f}s {elapsed / nodes * 1e6:>8.1f} {col + 1:>5}")
+    ai_agent.set_board_size(ROW_COUNT, COL_COUNT)
+
+# ----------------------------------------------------------------------
+# 7. GAME RECORD I/O
+# ----------------------------------------------------------------------
+
+def random_game_record(rng: random.Random):
+    """A random full game with stochastic AI drops and made-up think times."""
+    from game_record import GameRecord
+    record = GameRecord('EXPECTIMINIMAX', 5, rng.choice((HUMAN_PIECE, AI_PIECE)))
+    board = create_board()
+    piece = record.first_player
+    while True:
+        valid = get_valid_locations(board)
+        if not valid:
+            return record
+        col = rng.choice(valid)
+        landing_col = ai_agent.roll_landing_col(col, rng.random()) if piece == AI_PIECE else col
+        row = get_next_open_row(board, landing_col)
+        if row is not None:
+            board = drop_piece(board, row, landing_col, piece)
+        record.add_move(col, landing_col, rng.random() if piece == AI_PIECE else 0.0)
+        piece = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+
+def bench_records(count: int, path: str, seed: int):
+    import os
+    from game_record import GameRecordWriter, GameRecordReader, final_board
+    rng = random.Random(seed)
+    records = [random_game_record(rng) for _ in range(count)]
+    if os.path.exists(path):
+        os.remove(path)
+
+    start = time.perf_counter()
+    with GameRecordWriter(path, flush_every=1024) as writer:
+        for record in records:
+            writer.write(record)
+    write_time = time.perf_counter() - start
+    size = os.path.getsize(path)
+
+    start = time.perf_counter()
+    with GameRecordReader(path) as reader:
+        index_time = time.perf_counter() - start
+        start = time.perf_counter()
+        picks = [rng.randrange(len(reader)) for _ in range(count)]
+        decoded = [reader[i] for i in picks]
+        read_time = time.perf_counter() - start
+        for i, record in zip(picks[:200], decoded):
+            assert record.moves == records[i].moves and record.slips == records[i].slips, "Record round trip failed"
+            assert final_board(record) == final_board(records[i])
+    os.remove(path)
+
+    print(f"Games: {count}  |  File: {size} bytes ({size / count:.1f} bytes/game, "
+          f"{sum(len(r) for r in records) / count:.1f} moves/game)")
+    print(f"Write: {count / write_time:.0f} games/s  |  Index: {index_time * 1000:.1f} ms  |  "
+          f"Random reads: {count / read_time:.0f} games/s")
+
+# ----------------------------------------------------------------------
+# 8. STARTUP TIME
+# ----------------------------------------------------------------------
+
+# Child scripts: each reports {"import": s, "ready": s} on stderr and exits at the first
+# input prompt (console) or the first displayed frame (GUI).
+STARTUP_PROBES = {
+    'main.py': """
+import builtins, json, os, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+def first_prompt(*args):
+    sys.stderr.write(json.dumps({'import': imported - start, 'ready': time.perf_counter() - start}))
+    sys.stderr.flush()
+    os._exit(0)
+builtins.input = first_prompt
+sys.stdout = open(os.devnull, 'w')
+main.run_game()
+""",
+    'gui.py': """
+import json, os, sys, time
+start = time.perf_counter()
+import gui
+imported = time.perf_counter()
+import pygame
+def first_frame(*args):
+    sys.stderr.write(json.dumps({'import': imported - start, 'ready': time.perf_counter() - start}))
+    sys.stderr.flush()
+    os._exit(0)
+pygame.display.update = first_frame
+gui.main()
+""",
+}
+
+def bench_startup(runs: int, real_display: bool):
+    import json
+    import os
+    import statistics
+    import subprocess
+    import sys
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    if not real_display:
+        env.update(SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+
+    print(f"{'ENTRY POINT':<12} {'IMPORT':>9} {'FIRST FRAME/PROMPT':>19} {'PROCESS WALL':>13}   (median of {runs})")
+    for name, probe in STARTUP_PROBES.items():
+        imports, readies, walls = [], [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", probe], cwd=here, env=env, capture_output=True, text=True)
+            walls.append(time.perf_counter() - start)
+            try:
+                result = json.loads(proc.stderr.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                print(f"{name:<12} failed:\n{proc.stderr}")
+                break
+            imports.append(result['import'])
+            readies.append(result['ready'])
+        else:
+            print(f"{name:<12} {statistics.median(imports) * 1000:>7.1f}ms {statistics.median(readies) * 1000:>17.1f}ms "
+                  f"{statistics.median(walls) * 1000:>11.1f}ms")
+
+# ----------------------------------------------------------------------
+# 9. SPARSE-SAMPLING EXPECTIMINIMAX
+# ----------------------------------------------------------------------
+
+def reference_scores(board: Board, depth: int) -> Dict[int, float]:
+    """Exact expectiminimax value of every root column (the yardstick for the timed searches)."""
+    saved, ai_agent.CHANCE_SAMPLES = ai_agent.CHANCE_SAMPLES, 0
+    ai_agent.VISUALIZER.enabled = False
+    try:
+        return {col: ai_agent.calculate_chance_node(board, depth - 1, col, 0, f"root.{col}")
+                for col in get_valid_locations(board)}
+    finally:
+        ai_agent.CHANCE_SAMPLES = saved
+        ai_agent.VISUALIZER.enabled = True
+
+def bench_expecti_sampling(samples_list: List[int], budgets: List[float], reference_depth: int):
+    positions = BENCHMARK_POSITIONS + TACTICAL_POSITIONS
+    print(f"Reference: exact expectiminimax at depth {reference_depth} on {len(positions)} positions")
+    references = [reference_scores(position_from_moves(moves), reference_depth) for moves in positions]
+
+    print(f"{'BUDGET':>7} {'SAMPLES':>8} {'MEAN DEPTH':>11} {'AGREE':>7} {'MEAN REGRET':>12} {'MAX REGRET':>11}")
+    saved = ai_agent.CHANCE_SAMPLES
+    for budget in budgets:
+        for samples in [0] + samples_list:
+            ai_agent.CHANCE_SAMPLES = samples
+            depths, regrets = [], []
+            for moves, scores in zip(positions, references):
+                _, col, _, depth = ai_agent.find_best_move_timed(position_from_moves(moves), 'EXPECTIMINIMAX', budget)
+                depths.append(depth)
+                regrets.append(max(scores.values()) - scores[col])
+            agree = sum(1 for regret in regrets if regret == 0) / len(regrets)
+            print(f"{budget:>6.2f}s {samples or 'exact':>8} {sum(depths) / len(depths):>11.1f} {agree:>7.0%} "
+                  f"{sum(regrets) / len(regrets):>12.0f} {max(regrets):>11.0f}")
+    ai_agent.CHANCE_SAMPLES = saved
+
+# ----------------------------------------------------------------------
+# 10. TREE TRACE RECORDING
+# ----------------------------------------------------------------------
+
+def _drain(queue):
+    while queue.get() != "QUIT":
+        pass
+
+def bench_tree_trace(algorithms: List[str], depth: int, path: str, seeks: int):
+    """
+    Move time with no tree output, with every node streamed to another process (the live
+    tree window's transport, drawing excluded) and with the trace recorder; then trace I/O.
+    """
+    import multiprocessing
+    import os
+    from tree_trace import TreeTrace, TreeRecorder, TraceReplay, ALL_LEVELS
+    board = position_from_moves("33")
+
+    def cold_cache():
+        if ai_agent.get_evaluator().cache is not None:
+            ai_agent.get_evaluator().cache.clear()
+
+    print(f"{'ALGORITHM':<20} {'DEPTH':>5} {'NO TREE':>8} {'LIVE QUEUE':>11} {'RECORDER':>9} {'EVENTS':>9} "
+          f"{'FILE':>9} {'SAVE':>7} {'LOAD':>7} {'SEEK':>8}")
+    for algorithm in algorithms:
+        cold_cache()
+        _, _, plain = ai_agent.find_best_move(board, algorithm, depth, verbose=False)
+
+        queue = multiprocessing.Queue()
+        drain = multiprocessing.Process(target=_drain, args=(queue,))
+        drain.start()
+        cold_cache()
+        start = time.perf_counter()
+        ai_agent.find_best_move(board, algorithm, depth, queue.put, ALL_LEVELS, verbose=False)
+        queue.put("QUIT")
+        drain.join()
+        live = time.perf_counter() - start  # Until the viewer side has received everything
+
+        recorder = TreeRecorder()
+        cold_cache()
+        _, _, recorded = ai_agent.find_best_move(board, algorithm, depth, recorder, ALL_LEVELS, verbose=False)
+        start = time.perf_counter()
+        recorder.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        trace = TreeTrace.load(path)
+        loaded = time.perf_counter() - start
+
+        replay = TraceReplay(trace)
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(seeks):
+            replay.seek(rng.randrange(trace.event_count + 1))
+        seek = (time.perf_counter() - start) / seeks
+        size = os.path.getsize(path)
+        os.remove(path)
+        print(f"{algorithm:<20} {depth:>5} {plain:>7.2f}s {live:>10.2f}s {recorded:>8.2f}s {trace.event_count:>9} "
+              f"{size / 1024:>7.0f}kB {saved * 1000:>5.0f}ms {loaded * 1000:>5.0f}ms {seek * 1000:>6.1f}ms")
+
+# ----------------------------------------------------------------------
+# 11. COMPILED SEARCH KERNEL
+# ----------------------------------------------------------------------
+
+def bench_kernel(algorithms: List[str], depth: int):
+    if not ai_agent.kernel_available():
+        print("search_kernel needs NumPy and Numba; searches fall back to the recursive Python search")
+        return
+    saved = ai_agent.USE_SEARCH_KERNEL
+    start = time.perf_counter()
+    ai_agent.find_best_move(position_from_moves(""), 'MINIMAX_ALPHA_BETA', 1, verbose=False)
+    print(f"Kernel ready in {time.perf_counter() - start:.2f}s (compile, or load from Numba's cache)")
+
+    print(f"{'POSITION':<12} {'ALGORITHM':<20} {'NODES':>9} {'PYTHON':>8} {'KERNEL':>8} {'SPEEDUP':>8} {'MATCH':>6}")
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    mismatches = 0
+    for algorithm in algorithms:
+        for moves in BENCHMARK_POSITIONS + TACTICAL_POSITIONS:
+            board = position_from_moves(moves)
+            runs = {}
+            for use_kernel in (False, True):
+                ai_agent.USE_SEARCH_KERNEL = use_kernel
+                if ai_agent.get_evaluator().cache is not None:
+                    ai_agent.get_evaluator().cache.clear()
+                score, col, elapsed = ai_agent.find_best_move(board, algorithm, depth, verbose=False)
+                runs[use_kernel] = (score, col, ai_agent.VISUALIZER.nodes_visited, elapsed)
+                totals[use_kernel][0] += ai_agent.VISUALIZER.nodes_visited
+                totals[use_kernel][1] += elapsed
+            match = runs[False][:3] == runs[True][:3]
+            mismatches += not match
+            print(f"{moves or '(empty)':<12} {algorithm:<20} {runs[False][2]:>9} {runs[False][3]:>7.2f}s {runs[True][3]:>7.3f}s "
+                  f"{runs[False][3] / max(runs[True][3], 1e-9):>7.0f}x {'yes' if match else 'NO':>6}")
+    ai_agent.USE_SEARCH_KERNEL = saved
+
+    for use_kernel, name in ((False, "Python"), (True, "Kernel")):
+        nodes, elapsed = totals[use_kernel]
+        print(f"{name}: {nodes / elapsed:,.0f} nodes/s")
+    print(f"Score, move and node count identical on {len(algorithms) * (len(BENCHMARK_POSITIONS) + len(TACTICAL_POSITIONS)) - mismatches} "
+          f"of {len(algorithms) * (len(BENCHMARK_POSITIONS) + len(TACTICAL_POSITIONS))} searches")
+
+# ----------------------------------------------------------------------
+# 12. SELECTIVE DEPTH (LMR, RE-SEARCH, THREAT EXTENSIONS)
+# ----------------------------------------------------------------------
+
+SELECTIVE_CONFIGS = {
+    'uniform':           dict(USE_LMR=False, USE_RESEARCH=True, USE_THREAT_EXTENSIONS=False),
+    'threat-ext':        dict(USE_LMR=False, USE_RESEARCH=True, USE_THREAT_EXTENSIONS=True),
+    'lmr':               dict(USE_LMR=True, USE_RESEARCH=True, USE_THREAT_EXTENSIONS=False),
+    'lmr-no-research':   dict(USE_LMR=True, USE_RESEARCH=False, USE_THREAT_EXTENSIONS=False),
+    'lmr+threat-ext':    dict(USE_LMR=True, USE_RESEARCH=True, USE_THREAT_EXTENSIONS=True),
+}
+
+def bench_selective(budgets: List[float], reference_depth: int):
+    """Alpha-Beta at equal time per move, judged against a deep uniform search (run in the kernel if available)."""
+    positions = BENCHMARK_POSITIONS + TACTICAL_POSITIONS
+    saved = {name: getattr(ai_agent, name) for name in SELECTIVE_CONFIGS['uniform']}
+    ai_agent.VISUALIZER.enabled = False
+    references = []
+    start = time.perf_counter()
+    for moves in positions:
+        board = position_from_moves(moves)
+        cols = get_valid_locations(board)
+        if ai_agent.kernel_available():
+            scores, _ = ai_agent._KERNEL.score_columns(board, cols, reference_depth - 1, True, ai_agent.USE_THREAT_SEARCH,
+                                                       ai_agent.USE_SYMMETRY, ai_agent.MAX_FORCED_EXTENSIONS, ai_agent.WIN_SCORE, ai_agent.get_evaluator())
+        else:
+            scores = [ai_agent.minimax_alphabeta(drop_piece(board, get_next_open_row(board, col), col, AI_PIECE), reference_depth - 1,
+                                                 -ai_agent.INF, ai_agent.INF, False, True, 'FULL', 1, "root")
+                      for col in cols]
+        references.append(dict(zip(cols, scores)))
+    ai_agent.VISUALIZER.enabled = True
+    print(f"Reference: uniform Alpha-Beta at depth {reference_depth} on {len(positions)} positions "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    print(f"{'BUDGET':>7} {'CONFIG':<16} {'MEAN DEPTH':>11} {'MEAN NODES':>11} {'AGREE':>7} {'MEAN REGRET':>12}")
+    for budget in budgets:
+        for name, config in SELECTIVE_CONFIGS.items():
+            for key, value in config.items():
+                setattr(ai_agent, key, value)
+            depths, nodes, regrets = [], [], []
+            for moves, scores in zip(positions, references):
+                if ai_agent.get_evaluator().cache is not None:
+                    ai_agent.get_evaluator().cache.clear()
+                _, col, _, depth = ai_agent.find_best_move_timed(position_from_moves(moves), 'MINIMAX_ALPHA_BETA', budget)
+                depths.append(depth)
+                nodes.append(ai_agent.VISUALIZER.nodes_visited)
+                regrets.append(max(scores.values()) - scores[col])
+            agree = sum(1 for regret in regrets if regret == 0) / len(regrets)
+            print(f"{budget:>6.2f}s {name:<16} {sum(depths) / len(depths):>11.1f} {sum(nodes) / len(nodes):>11.0f} "
+                  f"{agree:>7.0%} {sum(regrets) / len(regrets):>12.0f}")
+    for key, value in saved.items():
+        setattr(ai_agent, key, value)
+
+def board_size(text: str) -> Tuple[int, int]:
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+# ----------------------------------------------------------------------
+# COMMAND LINE
+# ----------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Connect 4 engine benchmarks")
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    p = sub.add_parser('eval-cache', help="Search time with and without the evaluation cache")
+    p.add_argument('--algorithms', nargs='+', default=['MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX'])
+    p.add_argument('--depths', nargs='+', type=int, default=[5, 6, 7])
+    p.add_argument('--cache-size', type=int, default=ai_agent.EVAL_CACHE_SIZE)
+
+    p = sub.add_parser('symmetry', help="Nodes searched with and without mirror-symmetry reduction")
+    p.add_argument('--algorithms', nargs='+', default=['MINIMAX_NO_PRUNING', 'MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX'])
+    p.add_argument('--depth', type=int, default=4)
+
+    p = sub.add_parser('mcts-throughput', help="Playouts per second of root- and tree-parallel MCTS")
+    p.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    p.add_argument('--time', type=float, default=3.0, help="Search time per run (seconds)")
+    p.add_argument('--cutoff', type=int, default=8)
+    p.add_argument('--playout', default='LITE', choices=['LITE', 'RANDOM'])
+
+    p = sub.add_parser('forced-moves', help="Alpha-Beta nodes with and without forced-move detection")
+    p.add_argument('--depth', type=int, default=5)
+
+    p = sub.add_parser('final-score', help="Connected-four counting on random full boards, checked against check_final_score")
+    p.add_argument('--boards', type=int, default=20000)
+    p.add_argument('--seed', type=int, default=0)
+
+    p = sub.add_parser('board-size', help="Alpha-Beta search cost as the board grows")
+    p.add_argument('--sizes', nargs='+', type=board_size, default=[(6, 7), (8, 9), (10, 12)], help="ROWSxCOLS")
+    p.add_argument('--depths', nargs='+', type=int, default=[3, 4, 5])
+
+    p = sub.add_parser('records', help="Binary game-record size and read/write throughput")
+    p.add_argument('--games', type=int, default=20000)
+    p.add_argument('--path', default="benchmark_games.c4r", help="Scratch file (deleted afterwards)")
+    p.add_argument('--seed', type=int, default=0)
+
+    p = sub.add_parser('startup', help="Import time and time to first frame/prompt of main.py and gui.py")
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--display', action='store_true', help="Open real windows instead of SDL's dummy driver")
+
+    p = sub.add_parser('expecti-sampling', help="Sparse-sampling vs exact Expectiminimax moves at matched time budgets")
+    p.add_argument('--samples', nargs='+', type=int, default=[1, 2, 3], help="Landing draws per chance node")
+    p.add_argument('--budgets', nargs='+', type=float, default=[0.25, 1.0], help="Seconds per move")
+    p.add_argument('--reference-depth', type=int, default=5, help="Depth of the exact reference search")
+
+    p = sub.add_parser('tree-trace', help="Move time with live tree streaming vs trace recording, and trace I/O")
+    p.add_argument('--algorithms', nargs='+', default=['MINIMAX_NO_PRUNING', 'MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX'])
+    p.add_argument('--depth', type=int, default=5)
+    p.add_argument('--path', default="benchmark_trace.c4t", help="Scratch file (deleted afterwards)")
+    p.add_argument('--seeks', type=int, default=200, help="Random seeks timed per trace")
+
+    p = sub.add_parser('kernel', help="Recursive Python search vs the compiled search kernel")
+    p.add_argument('--algorithms', nargs='+', default=['MINIMAX_ALPHA_BETA', 'MINIMAX_NO_PRUNING'])
+    p.add_argument('--depth', type=int, default=6)
+
+    p = sub.add_parser('selective', help="LMR, re-search and threat extensions: depth and move quality at equal time")
+    p.add_argument('--budgets', nargs='+', type=float, default=[0.5, 2.0], help="Seconds per move")
+    p.add_argument('--reference-depth', type=int, default=9)
+
+    args = parser.parse_args()
+    if args.bench == 'eval-cache':
+        bench_eval_cache(args.algorithms, args.depths, args.cache_size)
+    elif args.bench == 'symmetry':
+        bench_symmetry(args.algorithms, args.depth)
+    elif args.bench == 'mcts-throughput':
+        bench_mcts_throughput(args.workers, args.time, args.cutoff, args.playout)
+    elif args.bench == 'forced-moves':
+        bench_forced_moves(args.depth)
+    elif args.bench == 'final-score':
+        bench_final_score(args.boards, args.seed)
+    elif args.bench == 'board-size':
+        bench_board_size(args.sizes, args.depths)
+    elif args.bench == 'records':
+        bench_records(args.games, args.path, args.seed)
+    elif args.bench == 'startup':
+        bench_startup(args.runs, args.display)
+    elif args.bench == 'expecti-sampling':
+        bench_expecti_sampling(args.samples, args.budgets, args.reference_depth)
+    elif args.bench == 'tree-trace':
+        bench_tree_trace(args.algorithms, args.depth, args.path, args.seeks)
+    elif args.bench == 'kernel':
+        bench_kernel(args.algorithms, args.depth)
+    elif args.bench == 'selective':
+        bench_selective(args.budgets, args.reference_depth)
+
+if __name__ == '__main__':
+    main()
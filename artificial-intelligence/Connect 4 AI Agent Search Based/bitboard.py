@@ -0,0 +1,143 @@
+from functools import lru_cache
+from typing import List, Tuple
+from game import ROW_COUNT, COL_COUNT, EMPTY, AI_PIECE, HUMAN_PIECE, Board, generate_window_indices
+
+# ----------------------------------------------------------------------
+# BITMASK BOARD: bit (r * cols + c) <-> cell (r, c)
+# ----------------------------------------------------------------------
+# Python ints have no width limit, so the same code serves 6x7, 8x9, 10x12, ...
+
+class BitboardTables:
+    """Precomputed masks for one board size (built once per size, see tables_for)."""
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        windows = generate_window_indices(rows, cols)
+
+        # Window masks, in the same order as BoardEvaluator.window_indices
+        self.window_masks: List[int] = [sum(self.cell_bit(r, c) for r, c in window) for window in windows]
+
+        # Cell -> ids of the windows containing it
+        self.cell_windows: List[List[List[int]]] = [[[] for _ in range(cols)] for _ in range(rows)]
+        for window_id, window in enumerate(windows):
+            for r, c in window:
+                self.cell_windows[r][c].append(window_id)
+
+        # Cell -> for every window through it, the mask of the window's other three cells.
+        # A player owning all three completes a four by dropping into the cell.
+        self.cell_threat_masks: List[List[List[int]]] = [
+            [[self.window_masks[w] ^ self.cell_bit(r, c) for w in self.cell_windows[r][c]] for c in range(cols)]
+            for r in range(rows)
+        ]
+
+        # (bit shift, valid window starts) per direction: horizontal, vertical, both diagonals.
+        # Each window is counted once, at its first cell, so rows never wrap into each other.
+        self.four_directions: List[Tuple[int, int]] = [
+            (1, self._start_mask(0, 1)),
+            (cols, self._start_mask(1, 0)),
+            (cols + 1, self._start_mask(1, 1)),
+            (cols - 1, self._start_mask(1, -1)),
+        ]
+
+    def cell_bit(self, r: int, c: int) -> int:
+        return 1 << (r * self.cols + c)
+
+    def _start_mask(self, dr: int, dc: int) -> int:
+        """Cells where a window stepping (dr, dc) three times stays on the board."""
+        mask = 0
+        for r in range(self.rows):
+            for c in range(self.cols):
+                if 0 <= r + 3 * dr < self.rows and 0 <= c + 3 * dc < self.cols:
+                    mask |= self.cell_bit(r, c)
+        return mask
+
+@lru_cache(maxsize=None)
+def tables_for(rows: int = ROW_COUNT, cols: int = COL_COUNT) -> BitboardTables:
+    return BitboardTables(rows, cols)
+
+def to_bitboards(board: Board) -> Tuple[int, int]:
+    """Returns (ai_mask, human_mask)."""
+    ai = human = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == AI_PIECE:
+                ai |= bit
+            elif cell == HUMAN_PIECE:
+                human |= bit
+            bit <<= 1
+    return ai, human
+
+def playable_cells(board: Board) -> List[Tuple[int, int]]:
+    """(row, col) of the next open cell in every non-full column."""
+    cells = []
+    for c in range(len(board[0])):
+        for r in range(len(board) - 1, -1, -1):
+            if board[r][c] == EMPTY:
+                cells.append((r, c))
+                break
+    return cells
+
+# ----------------------------------------------------------------------
+# FINAL SCORE (CONNECTED FOURS)
+# ----------------------------------------------------------------------
+
+def count_mask_fours(mask: int, tables: BitboardTables) -> int:
+    """Connected fours in one player's bitmask."""
+    total = 0
+    for shift, starts in tables.four_directions:
+        pairs = mask & (mask >> shift)
+        total += bin(pairs & (pairs >> (2 * shift)) & starts).count('1')
+    return total
+
+def count_fours(board: Board) -> Tuple[int, int]:
+    """(AI fours, Human fours) in one pass; same counts as check_final_score."""
+    tables = tables_for(len(board), len(board[0]))
+    ai, human = to_bitboards(board)
+    return count_mask_fours(ai, tables), count_mask_fours(human, tables)
+
+def count_fours_batch(boards):
+    """
+    Vectorized count over many boards at once (requires NumPy).
+    boards: array-like of shape (N, rows, cols). Returns an (N, 2) int array of (AI, Human) fours.
+    """
+    import numpy as np
+    boards = np.asarray(boards)
+    counts = np.zeros((boards.shape[0], 2), dtype=np.int64)
+    for i, piece in enumerate((AI_PIECE, HUMAN_PIECE)):
+        own = boards == piece
+        counts[:, i] += (own[:, :, :-3] & own[:, :, 1:-2] & own[:, :, 2:-1] & own[:, :, 3:]).sum(axis=(1, 2))
+        counts[:, i] += (own[:, :-3, :] & own[:, 1:-2, :] & own[:, 2:-1, :] & own[:, 3:, :]).sum(axis=(1, 2))
+        counts[:, i] += (own[:, :-3, :-3] & own[:, 1:-2, 1:-2] & own[:, 2:-1, 2:-1] & own[:, 3:, 3:]).sum(axis=(1, 2))
+        counts[:, i] += (own[:, :-3, 3:] & own[:, 1:-2, 2:-1] & own[:, 2:-1, 1:-2] & own[:, 3:, :-3]).sum(axis=(1, 2))
+    return counts
+
+# ----------------------------------------------------------------------
+# IMMEDIATE THREATS
+# ----------------------------------------------------------------------
+
+def immediate_threats(board: Board) -> Tuple[List[int], List[int]]:
+    """
+    Columns where the AI / the Human would complete a connected four with their next drop.
+    Only playable cells (respecting gravity) are checked, each against the windows through it.
+    """
+    threat_masks = tables_for(len(board), len(board[0])).cell_threat_masks
+    ai, human = to_bitboards(board)
+    ai_cols, human_cols = [], []
+    for r, c in playable_cells(board):
+        rests = threat_masks[r][c]
+        for mask in rests:
+            if ai & mask == mask:
+                ai_cols.append(c)
+                break
+        for mask in rests:
+            if human & mask == mask:
+                human_cols.append(c)
+                break
+    return ai_cols, human_cols
+
+if __name__ == '__main__':
+    for rows, cols in ((ROW_COUNT, COL_COUNT), (8, 9), (10, 12)):
+        tables = tables_for(rows, cols)
+        print(f"{rows}x{cols}: {len(tables.window_masks)} windows, "
+              f"{len(tables.cell_windows[rows - 1][cols // 2])} through the center bottom cell")
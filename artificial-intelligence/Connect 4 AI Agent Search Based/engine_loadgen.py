@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+from engine_server import DEFAULT_HOST, DEFAULT_PORT
+
+# ----------------------------------------------------------------------
+# LOAD GENERATOR FOR engine_server.py
+# ----------------------------------------------------------------------
+# Each simulated client plays whole games: a random Human move, then a
+# best_move request with play=true, until the board is full.
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def call(self, request: dict) -> dict:
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    def close(self):
+        self.writer.close()
+
+async def connect(host: str, port: int, unix_path: Optional[str]) -> Client:
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    return Client(reader, writer)
+
+async def run_client(args, latencies: List[float], errors: List[str], seed: int):
+    rng = random.Random(seed)
+    client = await connect(args.host, args.port, args.unix)
+    try:
+        for _ in range(args.games):
+            state = await client.call({'op': 'new_game', 'algorithm': args.algorithm, 'depth': args.depth})
+            session = state['session']
+            for _ in range(args.moves):
+                if state['game_over']:
+                    break
+                state = await client.call({'op': 'move', 'session': session, 'col': rng.choice(state['valid'])})
+                if state['game_over']:
+                    break
+
+                # Latency includes any retries after an 'overloaded' rejection
+                start = time.perf_counter()
+                while True:
+                    reply = await client.call({'op': 'best_move', 'session': session, 'time_budget': args.time_budget, 'play': True})
+                    if reply['ok'] or not reply.get('retry'):
+                        break
+                    errors.append(reply['error'])
+                    await asyncio.sleep(args.retry_delay)
+                if not reply['ok']:
+                    errors.append(reply['error'])
+                    break
+                latencies.append(time.perf_counter() - start)
+                state = reply
+            await client.call({'op': 'close', 'session': session})
+    finally:
+        client.close()
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_load(args):
+    latencies: List[float] = []
+    errors: List[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(args, latencies, errors, args.seed + i) for i in range(args.clients)))
+    wall = time.perf_counter() - start
+
+    print(f"Clients: {args.clients}  |  Games/client: {args.games}  |  Budget: {args.time_budget}s")
+    print(f"best_move answered: {len(latencies)}  |  rejected/failed attempts: {len(errors)} {sorted(set(errors))}")
+    if latencies:
+        print(f"Throughput: {len(latencies) / wall:.2f} req/s over {wall:.2f}s")
+        print(f"Latency p50: {percentile(latencies, 50) * 1000:.1f} ms  |  "
+              f"p99: {percentile(latencies, 99) * 1000:.1f} ms  |  max: {max(latencies) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the Connect 4 engine server")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="Connect to a Unix socket path instead of TCP")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--games', type=int, default=1, help="Games played by each client")
+    parser.add_argument('--moves', type=int, default=21, help="Max Human moves per game")
+    parser.add_argument('--algorithm', default='MINIMAX_ALPHA_BETA')
+    parser.add_argument('--depth', type=int, default=5, help="Max iterative-deepening depth")
+    parser.add_argument('--time-budget', type=float, default=0.5)
+    parser.add_argument('--retry-delay', type=float, default=0.05, help="Seconds to wait after an 'overloaded' reply")
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(run_load(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
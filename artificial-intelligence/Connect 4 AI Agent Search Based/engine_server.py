@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from game import (
+    AI_PIECE, HUMAN_PIECE, Board,
+    create_board, get_valid_locations, get_next_open_row, drop_piece,
+    is_terminal_node, check_final_score, board_to_string
+)
+import ai_agent
+
+# ----------------------------------------------------------------------
+# SERVER CONFIGURATION
+# ----------------------------------------------------------------------
+# Protocol: one JSON object per line in each direction. Requests:
+#   {"op": "new_game", "algorithm": "MINIMAX_ALPHA_BETA", "depth": 5}
+#   {"op": "move", "session": 1, "col": 3}                        (Human move, 0-based column)
+#   {"op": "best_move", "session": 1, "time_budget": 1.0, "play": true}
+#   {"op": "close", "session": 1}
+#   {"op": "stats"}
+# Every reply echoes the request "id" (if any) and carries "ok": true/false.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 64       # Searches queued or running (until they really finish) before new ones are rejected
+DEFAULT_TIME_BUDGET = 1.0      # Seconds per best_move request
+MAX_TIME_BUDGET = 30.0
+HARD_TIMEOUT_GRACE = 2.0       # Extra seconds (from when a worker starts the search) before its result is abandoned
+ALGORITHMS = ('MINIMAX_NO_PRUNING', 'MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX', 'MCTS')
+
+class RequestError(Exception):
+    """A client error reported back as {"ok": false, "error": ...}."""
+
+# ----------------------------------------------------------------------
+# WORKER SIDE (Runs inside the process pool)
+# ----------------------------------------------------------------------
+
+def search_job(board: Board, algorithm: str, max_depth: int, time_budget: float) -> Tuple[float, int, float, int, int]:
+    """Headless iterative-deepening search. Returns (score, col, elapsed, depth, nodes)."""
+    score, col, elapsed, depth = ai_agent.find_best_move_timed(board, algorithm, time_budget, max_depth)
+    return score, col, elapsed, depth, ai_agent.VISUALIZER.nodes_visited
+
+# ----------------------------------------------------------------------
+# SESSIONS
+# ----------------------------------------------------------------------
+
+class GameSession:
+    def __init__(self, session_id: int, algorithm: str, depth: int):
+        self.id = session_id
+        self.algorithm = algorithm
+        self.depth = depth
+        self.board = create_board()
+        self.lock = asyncio.Lock()  # One operation at a time per game
+
+    def state(self) -> dict:
+        state = {
+            'session': self.id,
+            'board': board_to_string(self.board),
+            'valid': get_valid_locations(self.board),
+            'game_over': is_terminal_node(self.board),
+        }
+        if state['game_over']:
+            state['ai_score'] = check_final_score(self.board, AI_PIECE)
+            state['human_score'] = check_final_score(self.board, HUMAN_PIECE)
+        return state
+
+class EngineServer:
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.free_workers = asyncio.Semaphore(workers)  # Held from submit until the search really ends
+        self.max_pending = max_pending
+        self.pending = 0
+        self.sessions: Dict[int, GameSession] = {}
+        self.session_ids = itertools.count(1)
+        self.stats = {'requests': 0, 'searches': 0, 'rejected': 0, 'timeouts': 0}
+
+    # --- REQUEST DISPATCH ---
+    async def handle_request(self, request: dict) -> dict:
+        self.stats['requests'] += 1
+        op = request.get('op')
+        if op == 'new_game':
+            return self.new_game(request)
+        if op == 'stats':
+            return {'ok': True, 'sessions': len(self.sessions), 'pending': self.pending, **self.stats}
+
+        session = self._get_session(request)
+        async with session.lock:
+            if op == 'move':
+                return self.human_move(session, request)
+            if op == 'best_move':
+                return await self.best_move(session, request)
+            if op == 'close':
+                del self.sessions[session.id]
+                return {'ok': True, 'session': session.id}
+        raise RequestError(f"Unknown op: {op!r}")
+
+    def _get_session(self, request: dict) -> GameSession:
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise RequestError(f"Unknown session: {request.get('session')!r}")
+        return session
+
+    def new_game(self, request: dict) -> dict:
+        algorithm = request.get('algorithm', 'MINIMAX_ALPHA_BETA')
+        if algorithm not in ALGORITHMS:
+            raise RequestError(f"Unknown algorithm: {algorithm!r}")
+        depth = int(request.get('depth', 5))
+        if depth < 1:
+            raise RequestError("depth must be >= 1")
+        session = GameSession(next(self.session_ids), algorithm, depth)
+        self.sessions[session.id] = session
+        return {'ok': True, **session.state()}
+
+    def human_move(self, session: GameSession, request: dict) -> dict:
+        col = request.get('col')
+        if col not in get_valid_locations(session.board):
+            raise RequestError(f"Illegal column: {col!r}")
+        session.board = drop_piece(session.board, get_next_open_row(session.board, col), col, HUMAN_PIECE)
+        return {'ok': True, **session.state()}
+
+    async def best_move(self, session: GameSession, request: dict) -> dict:
+        if is_terminal_node(session.board):
+            raise RequestError("Game is over")
+        time_budget = float(request.get('time_budget', DEFAULT_TIME_BUDGET))
+        if not time_budget > 0:  # Also rejects NaN
+            raise RequestError("time_budget must be a positive number")
+        time_budget = min(time_budget, MAX_TIME_BUDGET)
+
+        # --- BACKPRESSURE: Refuse instead of queueing without bound ---
+        if self.pending >= self.max_pending:
+            self.stats['rejected'] += 1
+            return {'ok': False, 'error': 'overloaded', 'retry': True}
+
+        # A job counts as pending from here until its worker is done with it, even if the
+        # reply has already timed out, so a backlog of stale searches leads to 'overloaded'
+        self.pending += 1
+        try:
+            await self.free_workers.acquire()  # The time budget only starts once a worker is free
+        except BaseException:
+            self.pending -= 1
+            raise
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, search_job, session.board, session.algorithm, session.depth, time_budget)
+        except BaseException:
+            self._search_finished()
+            raise
+        future.add_done_callback(self._search_finished)
+        try:
+            # shield: a timeout abandons the reply but the job keeps its worker slot until it ends
+            score, col, elapsed, depth, nodes = await asyncio.wait_for(asyncio.shield(future), time_budget + HARD_TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            return {'ok': False, 'error': 'search timed out'}  # Not retryable: resubmitting only adds to the backlog
+        self.stats['searches'] += 1
+
+        reply = {'ok': True, 'col': col, 'score': score, 'depth': depth, 'nodes': nodes, 'elapsed': elapsed}
+        if request.get('play'):
+            landing_col = col
+            if session.algorithm in ai_agent.STOCHASTIC_ALGORITHMS:
+                landing_col = ai_agent.roll_landing_col(col, random.random())
+            row = get_next_open_row(session.board, landing_col)
+            if row is not None:  # A piece that slips into a full column is lost
+                session.board = drop_piece(session.board, row, landing_col, AI_PIECE)
+            reply['landing_col'] = landing_col
+        reply.update(session.state())
+        return reply
+
+    def _search_finished(self, future=None):
+        self.pending -= 1
+        self.free_workers.release()
+
+    # --- CONNECTION HANDLING ---
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("Request must be a JSON object")
+                    reply = await self.handle_request(request)
+                except (RequestError, ValueError, TypeError) as e:
+                    request = request if isinstance(request, dict) else {}
+                    reply = {'ok': False, 'error': str(e)}
+                if 'id' in request:
+                    reply['id'] = request['id']
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def warm_up(self):
+        """Starts the worker processes before any socket is opened, so they never inherit it."""
+        self.pool.submit(search_job, create_board(), 'MINIMAX_ALPHA_BETA', 1, 0.0).result()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+# ----------------------------------------------------------------------
+# ENTRY POINT
+# ----------------------------------------------------------------------
+
+async def serve(host: str, port: int, unix_path: Optional[str], workers: int, max_pending: int):
+    engine = EngineServer(workers, max_pending)
+    engine.warm_up()
+    if unix_path:
+        server = await asyncio.start_unix_server(engine.handle_client, path=unix_path)
+        print(f"Connect 4 engine listening on unix:{unix_path} ({workers} workers)")
+    else:
+        server = await asyncio.start_server(engine.handle_client, host, port)
+        print(f"Connect 4 engine listening on {host}:{port} ({workers} workers)")
+    # Stop cleanly on Ctrl-C / SIGTERM so the worker processes exit with the server
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl-C still raises KeyboardInterrupt
+            pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        engine.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-game Connect 4 engine server (JSON lines)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ from typing import List, Tuple, Optional
 # --- GLOBAL CONSTANTS ---
 ROW_COUNT = 6    # Number of rows (0 is bottom)
 COL_COUNT = 7    # Number of columns
+# Default (standard) size. Other sizes (e.g. 8x9, 10x12) are created with create_board(rows, cols);
+# the functions below read the dimensions from the board itself.
 EMPTY = 0
 AI_PIECE = 2
 HUMAN_PIECE = 1
@@ -14,29 +16,90 @@ Board = List[List[int]]
 # BOARD MANIPULATION FUNCTIONS
 # ----------------------------------------------------------------------
 
-def create_board() -> Board:
-    """Initializes a new 6x7 board filled with zeros (EMPTY)."""
+def create_board(rows: int = ROW_COUNT, cols: int = COL_COUNT) -> Board:
+    """Initializes a new board (6x7 by default) filled with zeros (EMPTY)."""
     # Note: Connect 4 typically has Row 0 as the bottom, but we define it 
     # as the top row for list-of-list indexing convenience, and flip for printing.
-    return [[EMPTY for _ in range(COL_COUNT)] for _ in range(ROW_COUNT)]
+    if rows < 4 or cols < 4:
+        raise ValueError(f"Board must be at least 4x4, got {rows}x{cols}")
+    return [[EMPTY for _ in range(cols)] for _ in range(rows)]
 
 def get_valid_locations(board: Board) -> List[int]:
     """Returns a list of columns that are not full."""
     valid_locations = []
     # Check if the top-most row (Row 0) in the list is empty for a given column
-    for col in range(COL_COUNT):
+    for col in range(len(board[0])):
         if board[0][col] == EMPTY:
             valid_locations.append(col)
     return valid_locations
 
 def get_next_open_row(board: Board, col: int) -> Optional[int]:
     """Returns the highest empty row index (closest to the top/Row 0) in the column."""
-    # We iterate from the bottom-most row (ROW_COUNT - 1) up to the top (Row 0)
-    for r in range(ROW_COUNT - 1, -1, -1):
+    # We iterate from the bottom-most row up to the top (Row 0)
+    for r in range(len(board) - 1, -1, -1):
         if board[r][col] == EMPTY:
             return r
     return None # Column is full
 
+def board_key(board: Board) -> Tuple[Tuple[int, ...], ...]:
+    """Returns a hashable snapshot of the board (used as a cache key)."""
+    return tuple(map(tuple, board))
+
+def board_to_string(board: Board) -> str:
+    """Compact one-line encoding: one digit per cell, rows top to bottom separated by '/'."""
+    return "/".join("".join(map(str, row)) for row in board)
+
+def board_from_string(text: str, rows: int = ROW_COUNT, cols: int = COL_COUNT) -> Board:
+    """Parses the board_to_string encoding of a rows x cols board. Raises ValueError on malformed input."""
+    lines = text.strip().split("/")
+    if len(lines) != rows or any(len(line) != cols for line in lines):
+        raise ValueError(f"Expected {rows} rows of {cols} cells: {text!r}")
+    board = [[int(ch) for ch in line] for line in lines]
+    if any(cell not in (EMPTY, HUMAN_PIECE, AI_PIECE) for row in board for cell in row):
+        raise ValueError(f"Unknown piece in board string: {text!r}")
+    return board
+
+# ----------------------------------------------------------------------
+# MIRROR SYMMETRY (Reflection across the center column)
+# ----------------------------------------------------------------------
+
+def mirror_col(col: int, cols: int = COL_COUNT) -> int:
+    """Maps a column to its mirror image across the center column."""
+    return cols - 1 - col
+
+def mirror_board(board: Board) -> Board:
+    """Returns the board reflected across the center column."""
+    return [row[::-1] for row in board]
+
+def is_symmetric(board: Board) -> bool:
+    """True if the position equals its own mirror image."""
+    return all(row == row[::-1] for row in board)
+
+def canonical_key(board: Board) -> Tuple[Tuple[Tuple[int, ...], ...], bool]:
+    """
+    Returns (key, mirrored): one key shared by a position and its mirror image.
+    `mirrored` is True when the key was taken from the mirror, meaning any column
+    stored under this key must go through mirror_col to apply to `board`.
+    """
+    key = board_key(board)
+    mirrored_key = tuple(row[::-1] for row in key)
+    if mirrored_key < key:
+        return mirrored_key, True
+    return key, False
+
+def position_hash(board: Board) -> int:
+    """
+    Compact mirror-invariant key: the position packed into one int, 2 bits per cell
+    (exact, no collisions), taking the smaller of the position and its mirror image.
+    """
+    key = mirrored = 0
+    for row in board:
+        for cell in row:
+            key = (key << 2) | cell
+        for cell in reversed(row):
+            mirrored = (mirrored << 2) | cell
+    return min(key, mirrored)
+
 def drop_piece(board: Board, row: int, col: int, piece: int) -> Board:
     """Places the piece on the board[row][col]. Returns a new board copy."""
     # Crucial for search algorithms: Create a deep copy to ensure immutability
@@ -44,6 +107,30 @@ def drop_piece(board: Board, row: int, col: int, piece: int) -> Board:
     new_board[row][col] = piece
     return new_board
 
+def generate_window_indices(rows: int = ROW_COUNT, cols: int = COL_COUNT) -> List[List[Tuple[int, int]]]:
+    """
+    All winning windows (69 on 6x7) as lists of (row, col):
+    horizontal, vertical, positive and negative diagonals.
+    """
+    windows = []
+    # 1. Horizontal
+    for r in range(rows):
+        for c in range(cols - 3):
+            windows.append([(r, c + i) for i in range(4)])
+    # 2. Vertical
+    for c in range(cols):
+        for r in range(rows - 3):
+            windows.append([(r + i, c) for i in range(4)])
+    # 3. Positive Diagonal
+    for r in range(rows - 3):
+        for c in range(cols - 3):
+            windows.append([(r + i, c + i) for i in range(4)])
+    # 4. Negative Diagonal
+    for r in range(rows - 3):
+        for c in range(3, cols):
+            windows.append([(r + i, c - i) for i in range(4)])
+    return windows
+
 # ----------------------------------------------------------------------
 # TERMINAL / SCORE CHECKING FUNCTIONS
 # ----------------------------------------------------------------------
@@ -58,32 +145,33 @@ def check_final_score(board: Board, piece: int) -> int:
     Used for the game-ending condition and the heuristic.
     """
     score = 0
+    rows, cols = len(board), len(board[0])
     
     # 1. Horizontal Score Check
-    for r in range(ROW_COUNT):
-        for c in range(COL_COUNT - 3):
+    for r in range(rows):
+        for c in range(cols - 3):
             # Explicit list slice for the window
             window = board[r][c:c+4]
             score += check_window_for_score(window, piece)
 
     # 2. Vertical Score Check
-    for c in range(COL_COUNT):
-        for r in range(ROW_COUNT - 3):
+    for c in range(cols):
+        for r in range(rows - 3):
             window = [board[r+i][c] for i in range(4)]
             score += check_window_for_score(window, piece)
 
     # 3. Positive Diagonal Check (Bottom-Left to Top-Right)
     # Iterates through the board starting from the bottom-left corners that can host a diagonal
-    for r in range(ROW_COUNT - 3):
-        for c in range(COL_COUNT - 3):
+    for r in range(rows - 3):
+        for c in range(cols - 3):
             # Window goes up-right: (r, c), (r+1, c+1), (r+2, c+2), (r+3, c+3)
             window = [board[r+i][c+i] for i in range(4)]
             score += check_window_for_score(window, piece)
 
     # 4. Negative Diagonal Check (Top-Left to Bottom-Right)
     # Iterates through the board starting from the top-left corners that can host a downward diagonal
-    for r in range(ROW_COUNT - 3):
-        for c in range(3, COL_COUNT):
+    for r in range(rows - 3):
+        for c in range(3, cols):
             # Window goes up-left: (r, c), (r+1, c-1), (r+2, c-2), (r+3, c-3)
             # We must iterate down the rows but up the columns (r+i, c-i)
             window = [board[r+i][c-i] for i in range(4)]
@@ -98,12 +186,13 @@ def is_terminal_node(board: Board) -> bool:
 
 def print_board(board: Board):
     """Prints the board to the console, flipping rows for proper Connect 4 view."""
-    print("-----------------------------")
-    # Print from top to bottom (row 0 to ROW_COUNT-1)
-    for r in range(ROW_COUNT):
+    border = "-" * (4 * len(board[0]) + 1)
+    print(border)
+    # Print from top to bottom (row 0 to the last row)
+    for r in range(len(board)):
         print(f"| {' | '.join(map(str, board[r]))} |")
-    print("-----------------------------")
-    print(f"| 1 | 2 | 3 | 4 | 5 | 6 | 7 |")
+    print(border)
+    print(f"| {' | '.join(str(c + 1) for c in range(len(board[0])))} |")
 
 if __name__ == '__main__':
     # Simple test case for board creation and move logic
@@ -0,0 +1,255 @@
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterator, List, Optional, Tuple
+from game import (
+    ROW_COUNT, COL_COUNT, AI_PIECE, HUMAN_PIECE, Board,
+    create_board, get_next_open_row, drop_piece, check_final_score, print_board
+)
+
+# ----------------------------------------------------------------------
+# BINARY GAME RECORDS (.c4r)
+# ----------------------------------------------------------------------
+# File header (8 bytes):  b"C4GR", version, rows, cols, bits per move
+# Then one record per game, appended back to back (all little-endian):
+#   u32  length of the rest of the record in bytes
+#   u8   algorithm id (index into ALGORITHMS)
+#   u8   search depth
+#   u8   first player (HUMAN_PIECE / AI_PIECE)
+#   u16  move count n
+#   ceil(n * bits_per_move / 8) bytes   intended columns (3 bits each on 7 columns)
+#   ceil(n * 2 / 8) bytes               slip codes: 0 = left, 1 = as intended, 2 = right
+#   n * u16                             think time per move in milliseconds (saturating)
+# A full 42-move game on 6x7 takes 120 bytes.
+# Players alternate starting with the first player; a piece that slips into a full column is lost.
+
+MAGIC = b"C4GR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBBBB")
+RECORD_HEADER = struct.Struct("<IBBBH")
+ALGORITHMS = ('NONE', 'MINIMAX_NO_PRUNING', 'MINIMAX_ALPHA_BETA', 'EXPECTIMINIMAX', 'MCTS')
+MAX_TIME_MS = 0xFFFF
+
+def bits_per_move(cols: int) -> int:
+    return max(3, (cols - 1).bit_length())
+
+def pack_bits(values: List[int], bits: int) -> bytes:
+    packed = 0
+    for i, value in enumerate(values):
+        packed |= value << (i * bits)
+    return packed.to_bytes((len(values) * bits + 7) // 8, "little")
+
+def unpack_bits(data: bytes, count: int, bits: int) -> List[int]:
+    packed = int.from_bytes(data, "little")
+    mask = (1 << bits) - 1
+    return [(packed >> (i * bits)) & mask for i in range(count)]
+
+class GameRecord:
+    """
+    One game. `moves` are the intended columns in play order, `slips` the landing offset
+    of each move (-1, 0, +1; always 0 for deterministic moves) and `times` the seconds spent per move.
+    """
+    __slots__ = ('algorithm', 'depth', 'first_player', 'moves', 'slips', 'times')
+
+    def __init__(self, algorithm: str = 'NONE', depth: int = 0, first_player: int = HUMAN_PIECE,
+                 moves: Optional[List[int]] = None, slips: Optional[List[int]] = None, times: Optional[List[float]] = None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm!r}")
+        self.algorithm = algorithm
+        self.depth = depth
+        self.first_player = first_player
+        self.moves: List[int] = moves if moves is not None else []
+        self.slips: List[int] = slips if slips is not None else [0] * len(self.moves)
+        self.times: List[float] = times if times is not None else [0.0] * len(self.moves)
+
+    def add_move(self, col: int, landing_col: Optional[int] = None, elapsed: float = 0.0):
+        """Appends a move; `landing_col` defaults to the intended column."""
+        self.moves.append(col)
+        self.slips.append(0 if landing_col is None else landing_col - col)
+        self.times.append(elapsed)
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    # --- BINARY ENCODING ---
+    def encode(self, cols: int = COL_COUNT) -> bytes:
+        bits = bits_per_move(cols)
+        if any(not 0 <= col < cols for col in self.moves):
+            raise ValueError(f"Column out of range for a {cols}-column board")
+        if any(slip not in (-1, 0, 1) for slip in self.slips):
+            raise ValueError("Slip offsets must be -1, 0 or +1")
+        times_ms = [min(MAX_TIME_MS, int(round(t * 1000))) for t in self.times]
+        body = (pack_bits(self.moves, bits)
+                + pack_bits([slip + 1 for slip in self.slips], 2)
+                + struct.pack(f"<{len(times_ms)}H", *times_ms))
+        header = RECORD_HEADER.pack(RECORD_HEADER.size - 4 + len(body), ALGORITHMS.index(self.algorithm),
+                                    min(self.depth, 0xFF), self.first_player, len(self.moves))
+        return header + body
+
+    @classmethod
+    def decode(cls, data: bytes, cols: int = COL_COUNT) -> 'GameRecord':
+        _, algorithm_id, depth, first_player, n = RECORD_HEADER.unpack_from(data)
+        bits = bits_per_move(cols)
+        offset = RECORD_HEADER.size
+        move_bytes, slip_bytes = (n * bits + 7) // 8, (n * 2 + 7) // 8
+        moves = unpack_bits(data[offset:offset + move_bytes], n, bits)
+        offset += move_bytes
+        slips = [code - 1 for code in unpack_bits(data[offset:offset + slip_bytes], n, 2)]
+        offset += slip_bytes
+        times = struct.unpack_from(f"<{n}H", data, offset)
+        return cls(ALGORITHMS[algorithm_id], depth, first_player, moves, slips, [t / 1000 for t in times])
+
+# ----------------------------------------------------------------------
+# REPLAY
+# ----------------------------------------------------------------------
+
+def replay(record: GameRecord, rows: int = ROW_COUNT, cols: int = COL_COUNT) -> Iterator[Board]:
+    """Yields the board after every move of the record."""
+    board = create_board(rows, cols)
+    piece = record.first_player
+    for col, slip in zip(record.moves, record.slips):
+        landing_col = col + slip
+        row = get_next_open_row(board, landing_col)
+        if row is not None:  # A piece that slipped into a full column is lost
+            board = drop_piece(board, row, landing_col, piece)
+        yield board
+        piece = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+
+def final_board(record: GameRecord, rows: int = ROW_COUNT, cols: int = COL_COUNT) -> Board:
+    board = create_board(rows, cols)
+    for board in replay(record, rows, cols):
+        pass
+    return board
+
+# ----------------------------------------------------------------------
+# STREAMING WRITER / MEMORY-MAPPED READER
+# ----------------------------------------------------------------------
+
+def _check_header(data: bytes, path: str) -> Tuple[int, int]:
+    """Returns (rows, cols) from a file header. Raises ValueError if it is not a record file."""
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{path} is not a version {VERSION} game record file")
+    magic, version, rows, cols, bits = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or bits != bits_per_move(cols):
+        raise ValueError(f"{path} is not a version {VERSION} game record file")
+    return rows, cols
+
+def _record_offsets(data, size: int) -> Tuple[array, int]:
+    """Hops over the length prefixes. Returns (record offsets, end of the last complete record)."""
+    offsets = array('Q')
+    offset = FILE_HEADER.size
+    while offset + 4 <= size:
+        end = offset + 4 + int.from_bytes(data[offset:offset + 4], "little")
+        if end > size:
+            break  # Torn record from an interrupted writer
+        offsets.append(offset)
+        offset = end
+    return offsets, offset
+
+class GameRecordWriter:
+    """
+    Append-only writer. Records are buffered and flushed every `flush_every` games,
+    so a crash loses at most that many. A torn last record is truncated away on reopening.
+    """
+    def __init__(self, path: str, rows: int = ROW_COUNT, cols: int = COL_COUNT, flush_every: int = 64):
+        self.path = path
+        self.flush_every = flush_every
+        self.pending = 0
+        self.cols = cols
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header_rows, header_cols = _check_header(data[:FILE_HEADER.size], path)
+                if (header_rows, header_cols) != (rows, cols):
+                    raise ValueError(f"{path} holds {header_rows}x{header_cols} games, not {rows}x{cols}")
+                _, end = _record_offsets(data, len(data))
+                size = len(data)
+            if end != size:
+                os.truncate(path, end)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "ab")
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, rows, cols, bits_per_move(cols)))
+
+    def write(self, record: GameRecord):
+        self.file.write(record.encode(self.cols))
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecordWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class GameRecordReader:
+    """
+    Random access over a record file through mmap. Opening scans the length prefixes
+    once to build an offset index; records are decoded only when accessed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        if os.fstat(self.file.fileno()).st_size < FILE_HEADER.size:  # mmap cannot map an empty file
+            self.file.close()
+            raise ValueError(f"{path} is empty or too short to be a game record file")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.rows, self.cols = _check_header(self.map[:FILE_HEADER.size], path)
+        self.offsets, _ = _record_offsets(self.map, len(self.map))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> GameRecord:
+        offset = self.offsets[index]
+        length = 4 + int.from_bytes(self.map[offset:offset + 4], "little")
+        return GameRecord.decode(self.map[offset:offset + length], self.cols)
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecordReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ----------------------------------------------------------------------
+# COMMAND LINE
+# ----------------------------------------------------------------------
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect a binary Connect 4 game record file")
+    parser.add_argument('path')
+    parser.add_argument('game', type=int, nargs='?', help="Replay this game (0-based index)")
+    args = parser.parse_args()
+
+    with GameRecordReader(args.path) as reader:
+        if args.game is None:
+            size = os.path.getsize(args.path)
+            print(f"{len(reader)} games on a {reader.rows}x{reader.cols} board, {size} bytes "
+                  f"({size / max(1, len(reader)):.1f} bytes/game)")
+            return
+        record = reader[args.game]
+        board = final_board(record, reader.rows, reader.cols)
+        print(f"Game {args.game}: {record.algorithm} depth {record.depth}, {len(record)} moves, "
+              f"{sum(record.times):.2f}s thinking, {sum(1 for s in record.slips if s)} slips")
+        print_board(board)
+        print(f"AI: {check_final_score(board, AI_PIECE)}  |  Human: {check_final_score(board, HUMAN_PIECE)}")
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,13 @@ import sys
 import math
 import random
 import time
-import multiprocessing
 from game import (
     create_board, drop_piece, get_next_open_row, get_valid_locations, 
     is_terminal_node, check_final_score, 
     ROW_COUNT, COL_COUNT, AI_PIECE, HUMAN_PIECE, EMPTY
 )
-from ai_agent import find_best_move, get_probabilities
+from ai_agent import find_best_move, get_probabilities, STOCHASTIC_ALGORITHMS
+from tree_trace import TreeTrace, TreeRecorder, TraceReplay, FLAG_MAX
 
 # ==============================================================================
 #   ⚙️ GAME CONFIGURATION
@@ -19,6 +19,12 @@ DEFAULT_VIZ_DEPTH = 3
 DEFAULT_ALGO = 'MINIMAX_ALPHA_BETA'
 DEFAULT_STARTER = HUMAN_PIECE
 
+# Tree window: 'LIVE' streams the shown levels during the search; 'REPLAY' records them
+# to TRACE_FILE and replays them afterwards (the move is not slowed by drawing).
+TREE_MODE = 'LIVE'
+TRACE_FILE = "last_search.c4t"
+REPLAY_SECONDS = 10  # Default replay length, whatever the tree size
+
 # ==============================================================================
 #   🎨 VISUAL CONFIGURATION: CLASSIC COLORS x MODERN AESTHETIC
 # ==============================================================================
@@ -179,7 +185,47 @@ def draw_tree_recursive(surface, state, node_id, x, y, width_alloc, font):
         text_y = y - node_size - 15 if node['type'] == 'MAX' else y + node_size + 5
         surface.blit(lbl, (x - lbl.get_width()//2, text_y))
 
-def tree_process_main(queue):
+def draw_trace_recursive(surface, replay, node, x, y, width_alloc, font, max_level):
+    """draw_tree_recursive for a replayed trace: visited nodes down to max_level only."""
+    cfg = VISUAL_CONFIG['TREE']
+    node_size = cfg['NODE_SIZE']
+    trace = replay.trace
+
+    children = [c for c in replay.children[node] if replay.visited[c] and trace.level[c] <= max_level]
+    if children:
+        child_y = y + cfg['VERTICAL_SPACING']
+        step = width_alloc / len(children)
+        start_x = x - (width_alloc / 2) + (step / 2)
+        for i, child in enumerate(children):
+            child_x = start_x + i * step
+            pygame.draw.aaline(surface, cfg['LINE_COLOR'], (x, y + node_size), (child_x, child_y - node_size))
+            draw_trace_recursive(surface, replay, child, child_x, child_y, step, font, max_level)
+
+    maximizing = trace.flags[node] & FLAG_MAX
+    color = cfg['COLOR_MAX'] if maximizing else cfg['COLOR_MIN']
+    if replay.pruned[node]: color = cfg['COLOR_PRUNED']
+    if maximizing:
+        points = [(x, y - node_size), (x - node_size, y + node_size), (x + node_size, y + node_size)]
+    else:
+        points = [(x - node_size, y - node_size), (x + node_size, y - node_size), (x, y + node_size)]
+    pygame.draw.polygon(surface, color, points)
+    pygame.draw.polygon(surface, (200,200,200), points, 1)
+
+    score = replay.score[node]
+    if score == score:  # NaN until the node returns
+        s_txt = f"{score:g}"
+        if len(s_txt) > 5: s_txt = "Win" if score > 0 else "Loss"
+        lbl = font.render(s_txt, True, cfg['TEXT_SCORE_COLOR'])
+        text_y = y - node_size - 15 if maximizing else y + node_size + 5
+        surface.blit(lbl, (x - lbl.get_width()//2, text_y))
+
+def tree_process_main(queue=None, trace_path=None, view_depth=DEFAULT_VIZ_DEPTH):
+    """
+    Tree window. Shows live nodes from the queue, or replays a trace file, loaded at start
+    (trace_path) or sent as ("LOAD", path, view_depth).
+    Replay keys: SPACE pause, UP/DOWN speed, LEFT/RIGHT step 1%, HOME/END, PAGEUP/PAGEDOWN depth;
+    click the progress bar to seek.
+    """
     pygame.init()
     w, h = VISUAL_CONFIG['TREE_PANEL_WIDTH'], HEIGHT
     screen = pygame.display.set_mode((w, h), pygame.RESIZABLE)
@@ -187,7 +233,19 @@ def tree_process_main(queue):
     
     t_font = pygame.font.SysFont("consolas", 14, bold=True)
     state = TreeState()
+    replay = None
+    position, speed, playing = 0.0, 1.0, False
+    bar_h = 18
     
+    def load(path, depth):
+        nonlocal replay, position, speed, playing, view_depth
+        try: trace = TreeTrace.load(path)
+        except (OSError, ValueError): return
+        replay = TraceReplay(trace)
+        position, playing, view_depth = 0.0, True, depth
+        speed = max(1.0, trace.event_count / REPLAY_SECONDS)  # Events per second
+
+    if trace_path: load(trace_path, view_depth)
     running = True
     clock = pygame.time.Clock()
     
@@ -198,17 +256,43 @@ def tree_process_main(queue):
             elif event.type == pygame.VIDEORESIZE:
                 w, h = event.w, event.h
                 screen = pygame.display.set_mode((w, h), pygame.RESIZABLE)
+            elif replay and event.type == pygame.KEYDOWN:
+                total = replay.trace.event_count
+                if event.key == pygame.K_SPACE: playing = not playing
+                elif event.key == pygame.K_UP: speed *= 2
+                elif event.key == pygame.K_DOWN: speed = max(1.0, speed / 2)
+                elif event.key == pygame.K_RIGHT: position = min(total, position + max(1, total // 100))
+                elif event.key == pygame.K_LEFT: position = max(0, position - max(1, total // 100))
+                elif event.key == pygame.K_HOME: position = 0
+                elif event.key == pygame.K_END: position = total
+                elif event.key == pygame.K_PAGEUP: view_depth = max(1, view_depth - 1)
+                elif event.key == pygame.K_PAGEDOWN: view_depth += 1
+            elif replay and event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= h - bar_h:
+                position = replay.trace.event_count * event.pos[0] / w
 
         try:
-            while not queue.empty():
+            while queue is not None and not queue.empty():
                 msg = queue.get_nowait()
-                if msg == "RESET": state.reset()
+                if msg == "RESET": state.reset(); replay = None
                 elif msg == "QUIT": running = False
+                elif isinstance(msg, tuple) and msg[0] == "LOAD": load(msg[1], msg[2])
                 else: state.update_node(msg)
         except: pass
 
         screen.fill(VISUAL_CONFIG['TREE']['BG_COLOR'])
-        if 'root' in state.nodes:
+        if replay:
+            total = replay.trace.event_count
+            if playing:
+                position = min(total, position + speed * clock.get_time() / 1000)
+            replay.seek(int(position))
+            if replay.trace.node_count and replay.visited[0]:
+                draw_trace_recursive(screen, replay, 0, w//2, 50, w * 0.95, t_font, view_depth)
+            pygame.draw.rect(screen, VISUAL_CONFIG['UI']['BTN_DEFAULT'], (0, h - bar_h, w, bar_h))
+            pygame.draw.rect(screen, VISUAL_CONFIG['UI']['BTN_SELECTED'], (0, h - bar_h, int(w * replay.step / max(1, total)), bar_h))
+            hud = (f"{replay.step}/{total} events  {speed:.0f}/s  depth {view_depth}"
+                   f"{'' if playing else '  PAUSED'}  [SPACE UP DOWN LEFT RIGHT PGUP PGDN]")
+            screen.blit(t_font.render(hud, True, VISUAL_CONFIG['TREE']['TEXT_METADATA_COLOR']), (8, h - bar_h - 20))
+        elif 'root' in state.nodes:
             draw_tree_recursive(screen, state, 'root', w//2, 50, w * 0.95, t_font)
             
         pygame.display.update()
@@ -217,6 +301,33 @@ def tree_process_main(queue):
     pygame.quit()
     sys.exit()
 
+class TreeViewer:
+    """
+    Handle on the tree visualization process. The process (a second pygame window) is only
+    spawned when the first search node is sent, so the menu and Human turns never pay for it.
+    """
+    def __init__(self):
+        self.queue = None
+        self.process = None
+
+    def send(self, data):
+        if self.process is None:
+            import multiprocessing
+            self.queue = multiprocessing.Queue()
+            self.process = multiprocessing.Process(target=tree_process_main, args=(self.queue,))
+            self.process.start()
+        if self.process.is_alive():
+            try: self.queue.put(data)
+            except: pass
+
+    def reset(self):
+        if self.process is not None and self.process.is_alive():
+            self.queue.put("RESET")
+
+    def close(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+
 # --- UI CLASSES ---
 class Button:
     def __init__(self, x, y, w, h, text, callback, val=None):
@@ -271,7 +382,7 @@ def set_starter(val): config['starter'] = val
 def inc_depth(): config['depth'] = min(7, config['depth'] + 1)
 def dec_depth(): config['depth'] = max(1, config['depth'] - 1)
 def inc_gui_depth(): config['gui_depth'] = min(7, config['gui_depth'] + 1)
-def dec_gui_depth(): config['gui_depth'] = max(1, config['gui_depth'] - 1)
+def dec_gui_depth(): config['gui_depth'] = max(0, config['gui_depth'] - 1)  # 0 = tree window off
 
 # --- GRAPHICS HELPERS ---
 def create_board_overlay():
@@ -390,9 +501,10 @@ def menu_screen():
     mid_x = GAME_WIDTH // 2
     
     btns = [
-        Button(50, 120, 180, 45, "Minimax", lambda: set_algo('MINIMAX_NO_PRUNING')),
-        Button(240, 120, 200, 45, "Alpha-Beta", lambda: set_algo('MINIMAX_ALPHA_BETA')),
-        Button(450, 120, 200, 45, "Expectiminimax", lambda: set_algo('EXPECTIMINIMAX')),
+        Button(15, 120, 130, 45, "Minimax", lambda: set_algo('MINIMAX_NO_PRUNING')),
+        Button(155, 120, 150, 45, "Alpha-Beta", lambda: set_algo('MINIMAX_ALPHA_BETA')),
+        Button(315, 120, 200, 45, "Expectiminimax", lambda: set_algo('EXPECTIMINIMAX')),
+        Button(525, 120, 160, 45, "MCTS", lambda: set_algo('MCTS')),
         
         Button(mid_x - 100, 260, 60, 50, "-", dec_depth),
         Button(mid_x + 40, 260, 60, 50, "+", inc_depth),
@@ -415,14 +527,14 @@ def menu_screen():
         lbl_alg = font_small.render(f"ALGORITHM: {config['algo'].replace('_', ' ')}", True, VISUAL_CONFIG['TEXT_GRAY'])
         main_screen.blit(lbl_alg, (GAME_WIDTH//2 - lbl_alg.get_width()//2, 90))
         
-        lbl_depth = font_small.render("SEARCH DEPTH (K)", True, VISUAL_CONFIG['TEXT_GRAY'])
+        lbl_depth = font_small.render("PLAYOUT CUTOFF (K)" if config['algo'] == 'MCTS' else "SEARCH DEPTH (K)", True, VISUAL_CONFIG['TEXT_GRAY'])
         main_screen.blit(lbl_depth, (GAME_WIDTH//2 - lbl_depth.get_width()//2, 220))
         depth_val = font_large.render(str(config['depth']), True, VISUAL_CONFIG['AI_PIECE']['MAIN'])
         main_screen.blit(depth_val, (GAME_WIDTH//2 - depth_val.get_width()//2, 255))
 
         lbl_viz = font_small.render("TREE VIZ DEPTH", True, VISUAL_CONFIG['TEXT_GRAY'])
         main_screen.blit(lbl_viz, (GAME_WIDTH//2 - lbl_viz.get_width()//2, 340))
-        viz_val = font_large.render(str(config['gui_depth']), True, VISUAL_CONFIG['TEXT_WHITE'])
+        viz_val = font_large.render(str(config['gui_depth']) if config['gui_depth'] else "OFF", True, VISUAL_CONFIG['TEXT_WHITE'])
         main_screen.blit(viz_val, (GAME_WIDTH//2 - viz_val.get_width()//2, 365))
         
         lbl_start = font_small.render("FIRST PLAYER", True, VISUAL_CONFIG['TEXT_GRAY'])
@@ -434,6 +546,7 @@ def menu_screen():
             if "Minimax" in b.text and config['algo'] == 'MINIMAX_NO_PRUNING': b.selected = True
             elif "Alpha" in b.text and config['algo'] == 'MINIMAX_ALPHA_BETA': b.selected = True
             elif "Expecti" in b.text and config['algo'] == 'EXPECTIMINIMAX': b.selected = True
+            elif "MCTS" in b.text and config['algo'] == 'MCTS': b.selected = True
             elif "Human" in b.text and config['starter'] == HUMAN_PIECE: b.selected = True
             elif "AI" in b.text and config['starter'] == AI_PIECE: b.selected = True
             else: b.selected = False
@@ -457,21 +570,20 @@ def game_screen():
     game_over = False
     turn = config['starter']
     
-    tree_queue = multiprocessing.Queue()
-    tree_p = multiprocessing.Process(target=tree_process_main, args=(tree_queue,))
-    tree_p.start()
+    viewer = TreeViewer()
     
-    def tree_callback(data):
-        if tree_p.is_alive():
-            if data is not None:
-                try: tree_queue.put(data)
-                except: pass
-        
+    def pump_events():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                if tree_p.is_alive(): tree_p.terminate()
+                viewer.close()
                 sys.exit()
 
+    def tree_callback(data):
+        # Also pumps the event queue, so the window stays responsive during the search
+        if data is not None and config['gui_depth'] > 0:
+            viewer.send(data)
+        pump_events()
+
     render_game_frame(board, turn_msg="AI INITIALIZING..." if turn == AI_PIECE else "YOUR TURN")
     if turn == AI_PIECE: pygame.time.wait(800)
     
@@ -479,7 +591,7 @@ def game_screen():
         current_msg = "YOUR TURN" if turn == HUMAN_PIECE else f"AI COMPUTING (Depth {config['depth']})..."
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                if tree_p.is_alive(): tree_p.terminate()
+                viewer.close()
                 sys.exit()
             
             if turn == HUMAN_PIECE:
@@ -498,17 +610,23 @@ def game_screen():
                             board = drop_piece(board, row, col, HUMAN_PIECE)
                             if is_terminal_node(board): game_over = True
                             turn = AI_PIECE
-                            if tree_p.is_alive(): tree_queue.put("RESET")
+                            viewer.reset()
                             render_game_frame(board, turn_msg=f"AI THINKING...")
                             pygame.time.wait(200)
 
         if turn == AI_PIECE and not game_over:
             render_game_frame(board, turn_msg=current_msg)
             
-            score, col, elapsed = find_best_move(board, config['algo'], config['depth'], tree_callback, config['gui_depth'])
+            if TREE_MODE == 'REPLAY' and config['gui_depth'] > 0:
+                recorder = TreeRecorder(pump=pump_events)
+                score, col, elapsed = find_best_move(board, config['algo'], config['depth'], recorder, config['gui_depth'])
+                recorder.save(TRACE_FILE)
+                viewer.send(("LOAD", TRACE_FILE, config['gui_depth']))
+            else:
+                score, col, elapsed = find_best_move(board, config['algo'], config['depth'], tree_callback, config['gui_depth'])
             
             final_col = col
-            if config['algo'] == 'EXPECTIMINIMAX':
+            if config['algo'] in STOCHASTIC_ALGORITHMS:
                 final_col = execute_visual_stochastic(board, col)
             
             if final_col in get_valid_locations(board):
@@ -550,15 +668,15 @@ def game_screen():
         while waiting:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    if tree_p.is_alive(): tree_p.terminate()
+                    viewer.close()
                     sys.exit()
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     waiting = False
-                    if tree_p.is_alive(): tree_p.terminate()
+                    viewer.close()
                     return
 
-if __name__ == '__main__':
-    multiprocessing.freeze_support()
+def main():
+    global font_small, font_tiny, font_medium, font_large, main_screen
     pygame.init()
     
     fonts = ['segoeui', 'arial', 'helvetica', 'freesansbold']
@@ -572,4 +690,12 @@ if __name__ == '__main__':
     
     while True:
         menu_screen()
-        game_screen()
\ No newline at end of file
+        game_screen()
+
+if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) == 3 and sys.argv[1] == '--replay':
+        tree_process_main(trace_path=sys.argv[2])  # Standalone viewer for a saved trace
+    else:
+        main()
\ No newline at end of file
@@ -1,5 +1,78 @@
-from typing import List, Tuple, Dict
-from game import ROW_COUNT, COL_COUNT, EMPTY, AI_PIECE, HUMAN_PIECE, Board
+import json
+import os
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Hashable, Optional
+from game import ROW_COUNT, COL_COUNT, EMPTY, AI_PIECE, HUMAN_PIECE, Board, position_hash, generate_window_indices
+
+# ----------------------------------------------------------------------
+# EVALUATION WEIGHTS
+# ----------------------------------------------------------------------
+# Hand-picked defaults; tune_weights.py writes tuned values to WEIGHTS_FILE.
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    'center': 1.0,   # Scale of the positional (center control) matrix
+    'three': 100,    # Three in a window with the fourth cell empty
+    'two': 5,        # Two in a window with two empty cells
+    'fork': 5000,    # Empty cell completing two or more windows
+    'parity': 50,    # AI threat on an odd row
+}
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights.json")
+
+def load_weights(path: str = WEIGHTS_FILE) -> Dict[str, float]:
+    """DEFAULT_WEIGHTS overridden by the JSON weights file, if it exists."""
+    weights = dict(DEFAULT_WEIGHTS)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            loaded = json.load(f)
+        unknown = set(loaded) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown weights in {path}: {sorted(unknown)}")
+        weights.update(loaded)
+    return weights
+
+def save_weights(weights: Dict[str, float], path: str = WEIGHTS_FILE):
+    with open(path, "w") as f:
+        json.dump(weights, f, indent=2)
+
+class EvaluationCache:
+    """
+    Fixed-size LRU cache of leaf evaluations.
+    Entries are keyed by one int: the position hash (game.position_hash) with the scoring
+    mode in the lowest bit, so 'FULL' and 'LITE' scores are stored side by side, a position
+    and its mirror image share one entry, and a key costs ~40 bytes instead of a board copy.
+    """
+    def __init__(self, max_size: int = 200000):
+        self.max_size = max_size
+        self.entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[float]:
+        score = self.entries.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)  # Mark as most recently used
+        self.hits += 1
+        return score
+
+    def put(self, key: Hashable, score: float):
+        self.entries[key] = score
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)  # Evict least recently used
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.reset_stats()
+
 
 class BoardEvaluator:
     """
@@ -11,50 +84,73 @@ class BoardEvaluator:
     3. Double Threat / Fork Detection (7-shape logic)
     4. Parity/Zugzwang Awareness (Odd/Even row strategy)
     """
-    def __init__(self):
-        # Pre-calculate all 69 winning window indices for O(1) access
+    def __init__(self, cache_size: int = 0, rows: int = ROW_COUNT, cols: int = COL_COUNT,
+                 weights: Optional[Dict[str, float]] = None):
+        # Optional evaluation cache (0 disables it)
+        self.cache: Optional[EvaluationCache] = EvaluationCache(cache_size) if cache_size > 0 else None
+        self.rows = rows
+        self.cols = cols
+        self.weights: Dict[str, float] = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        # Pre-calculate all winning window indices (69 on 6x7) for O(1) access
         self.window_indices: List[List[Tuple[int, int]]] = []
         self.generate_window_indices()
+
+        # Cell -> windows through it (for move-local threat checks)
+        self.cell_windows: Dict[Tuple[int, int], List[List[Tuple[int, int]]]] = {}
+        for indices in self.window_indices:
+            for cell in indices:
+                self.cell_windows.setdefault(cell, []).append(indices)
         
         # Pre-calculate a positional weight matrix (Center Control)
-        # Prefer center columns: [3, 4, 5, 7, 5, 4, 3]
-        self.positional_weights = [
-            [3, 4, 5, 7, 5, 4, 3],  # Row 0 (Top)
-            [4, 6, 8, 10, 8, 6, 4],
-            [5, 8, 11, 13, 11, 8, 5],
-            [5, 8, 11, 13, 11, 8, 5],
-            [4, 6, 8, 10, 8, 6, 4],
-            [3, 4, 5, 7, 5, 4, 3]   # Row 5 (Bottom)
-        ]
+        # Weight = number of windows through the cell; on 6x7:
+        #   [3, 4, 5, 7, 5, 4, 3]  Row 0 (Top)
+        #   [4, 6, 8, 10, 8, 6, 4]
+        #   [5, 8, 11, 13, 11, 8, 5]  (mirrored for the bottom half)
+        self.positional_weights = self.generate_positional_weights()
 
     def generate_window_indices(self):
-        # 1. Horizontal
-        for r in range(ROW_COUNT):
-            for c in range(COL_COUNT - 3):
-                self.window_indices.append([(r, c + i) for i in range(4)])
-        # 2. Vertical
-        for c in range(COL_COUNT):
-            for r in range(ROW_COUNT - 3):
-                self.window_indices.append([(r + i, c) for i in range(4)])
-        # 3. Positive Diagonal
-        for r in range(ROW_COUNT - 3):
-            for c in range(COL_COUNT - 3):
-                self.window_indices.append([(r + i, c + i) for i in range(4)])
-        # 4. Negative Diagonal
-        for r in range(ROW_COUNT - 3):
-            for c in range(3, COL_COUNT):
-                self.window_indices.append([(r + i, c - i) for i in range(4)])
+        self.window_indices.extend(generate_window_indices(self.rows, self.cols))
+
+    def generate_positional_weights(self) -> List[List[float]]:
+        weights = [[0] * self.cols for _ in range(self.rows)]
+        for indices in self.window_indices:
+            for r, c in indices:
+                weights[r][c] += 1
+        scale = self.weights['center']
+        return [[w * scale for w in row] for row in weights] if scale != 1 else weights
+
+    def creates_three(self, board: Board, r: int, c: int, piece: int) -> bool:
+        """True if (r, c) lies in a window holding three of `piece` and one empty cell (a 'three' threat)."""
+        for indices in self.cell_windows[(r, c)]:
+            cells = [board[wr][wc] for wr, wc in indices]
+            if cells.count(piece) == 3 and cells.count(EMPTY) == 1:
+                return True
+        return False
 
     def evaluate(self, board: Board, scoring_mode: str = 'FULL') -> float:
         """
         Master evaluation function.
+        Served from the evaluation cache when one is attached.
+        The score is mirror-symmetric, so mirrored positions share cache entries.
         """
+        if self.cache is None:
+            return self._evaluate_uncached(board, scoring_mode)
+
+        key = position_hash(board) << 1 | (scoring_mode == 'LITE')
+        score = self.cache.get(key)
+        if score is None:
+            score = self._evaluate_uncached(board, scoring_mode)
+            self.cache.put(key, score)
+        return score
+
+    def _evaluate_uncached(self, board: Board, scoring_mode: str) -> float:
         score = 0.0
         
         # --- 1. POSITIONAL SCORE (Center Control) ---
         # Fast lookup of piece positions to encourage center play
-        for r in range(ROW_COUNT):
-            for c in range(COL_COUNT):
+        for r in range(self.rows):
+            for c in range(self.cols):
                 piece = board[r][c]
                 if piece == AI_PIECE:
                     score += self.positional_weights[r][c]
@@ -68,9 +164,20 @@ class BoardEvaluator:
         score += self._evaluate_advanced_threats(board)
         return score
 
+    @staticmethod
+    def _four_outcome(ai_fours: int, human_fours: int) -> float:
+        """
+        Win/Loss score once connected fours exist. The side with more fours wins,
+        as in check_final_score, so the result never depends on window scan order.
+        """
+        if ai_fours > human_fours: return 1000000
+        if human_fours > ai_fours: return -1000000
+        return 0.0
+
     def _evaluate_windows_lite(self, board: Board) -> float:
         """Fast scoring for Expectiminimax (Win/Loss only)."""
         score = 0.0
+        ai_fours = human_fours = 0
         for indices in self.window_indices:
             # Fast unpacking
             cells = [board[r][c] for r, c in indices]
@@ -78,10 +185,13 @@ class BoardEvaluator:
             human_count = cells.count(HUMAN_PIECE)
             empty_count = cells.count(EMPTY)
 
-            if ai_count == 4: return 1000000
-            if human_count == 4: return -1000000
+            if ai_count == 4: ai_fours += 1; continue
+            if human_count == 4: human_fours += 1; continue
             # Simple blocking logic
             if human_count == 3 and empty_count == 1: score -= 5000
+
+        if ai_fours or human_fours:
+            return self._four_outcome(ai_fours, human_fours)
         return score
 
     def _evaluate_advanced_threats(self, board: Board) -> float:
@@ -91,6 +201,8 @@ class BoardEvaluator:
         # Dictionary key: (row, col), Value: count of winning lines passing through this empty spot
         ai_threats: Dict[Tuple[int, int], int] = {}
         human_threats: Dict[Tuple[int, int], int] = {}
+        ai_fours = human_fours = 0
+        three, two = self.weights['three'], self.weights['two']
 
         for indices in self.window_indices:
             cells = [board[r][c] for r, c in indices]
@@ -99,12 +211,12 @@ class BoardEvaluator:
             empty_count = cells.count(EMPTY)
 
             # --- STANDARD WINDOW SCORING ---
-            if ai_count == 4: return 1000000
-            if human_count == 4: return -1000000
+            if ai_count == 4: ai_fours += 1; continue
+            if human_count == 4: human_fours += 1; continue
             
             # AI Threats (3 AI + 1 Empty)
             if ai_count == 3 and empty_count == 1:
-                score += 100  # Base score for having 3
+                score += three  # Base score for having 3
                 # Find the empty spot coordinate
                 for r, c in indices:
                     if board[r][c] == EMPTY:
@@ -112,16 +224,19 @@ class BoardEvaluator:
             
             # Human Threats (3 Human + 1 Empty)
             elif human_count == 3 and empty_count == 1:
-                score -= 100
+                score -= three
                 for r, c in indices:
                     if board[r][c] == EMPTY:
                         human_threats[(r, c)] = human_threats.get((r, c), 0) + 1
 
             # Setup potential (2 pieces)
             elif ai_count == 2 and empty_count == 2:
-                score += 5
+                score += two
             elif human_count == 2 and empty_count == 2:
-                score -= 5
+                score -= two
+
+        if ai_fours or human_fours:
+            return self._four_outcome(ai_fours, human_fours)
 
         # --- 3. DOUBLE THREAT & PARITY LOGIC ---
         
@@ -129,7 +244,7 @@ class BoardEvaluator:
         for (r, c), count in ai_threats.items():
             # Double Threat: If one empty spot completes >= 2 winning lines
             if count >= 2:
-                score += 5000  # Huge bonus for creating a fork
+                score += self.weights['fork']  # Huge bonus for creating a fork
             
             # Parity / Zugzwang Strategy
             # If the threat is on an EVEN row (0, 2, 4) (Visual bottom is 5, logic is inverted)
@@ -140,12 +255,12 @@ class BoardEvaluator:
             
             # If a spot is an "Odd" threat (Row index % 2 != 0), it's usually stronger for Player 1
             if r % 2 != 0: 
-                score += 50 # Slight bonus for favorable parity
+                score += self.weights['parity'] # Slight bonus for favorable parity
 
         # Analyze Human Threats (Defensive)
         for (r, c), count in human_threats.items():
             if count >= 2:
-                score -= 5000 # Must block double threats immediately!
+                score -= self.weights['fork'] # Must block double threats immediately!
 
         return score
 
@@ -1,21 +1,26 @@
 import random
 import time
-from typing import Optional
+from typing import Optional, Tuple
 from game import (
     ROW_COUNT, COL_COUNT, AI_PIECE, HUMAN_PIECE, EMPTY, Board,
     create_board, get_valid_locations, get_next_open_row, drop_piece, 
     is_terminal_node, check_final_score, print_board
 )
-from ai_agent import find_best_move, get_probabilities
+from ai_agent import find_best_move, get_probabilities, STOCHASTIC_ALGORITHMS
+from game_record import GameRecord, GameRecordWriter
+
+# Finished games are appended here in the binary record format, e.g. "games.c4r"
+# (opt-in: None disables recording)
+RECORD_FILE: Optional[str] = None
 
 # ----------------------------------------------------------------------
 # HELPER FUNCTIONS FOR GAME EXECUTION
 # ----------------------------------------------------------------------
 
-def execute_stochastic_move(board: Board, chosen_col: int, piece: int) -> Board:
+def execute_stochastic_move(board: Board, chosen_col: int, piece: int) -> Tuple[Board, int]:
     """
     Executes the move on the board using RNG to determine the final landing column.
-    Uses the 0.6/0.2/0.2 or 0.6/0.4 distribution.
+    Uses the 0.6/0.2/0.2 or 0.6/0.4 distribution. Returns (new board, landing column).
     """
     rand = random.random()
     
@@ -41,10 +46,10 @@ def execute_stochastic_move(board: Board, chosen_col: int, piece: int) -> Board:
     row = get_next_open_row(board, landing_col)
     if row is not None:
         new_board = drop_piece(board, row, landing_col, piece)
-        return new_board
+        return new_board, landing_col
     else:
         print(f"\n! WARNING: Piece aimed at {chosen_col + 1} slipped into full column {landing_col + 1}!")
-        return board 
+        return board, landing_col
 
 # ----------------------------------------------------------------------
 # MAIN GAME LOOP
@@ -57,11 +62,12 @@ def run_game():
     algorithm_map = {
         '1': 'MINIMAX_NO_PRUNING',
         '2': 'MINIMAX_ALPHA_BETA',
-        '3': 'EXPECTIMINIMAX'
+        '3': 'EXPECTIMINIMAX',
+        '4': 'MCTS'
     }
     try:
-        alg_choice = input("Select Algorithm (1: Minimax, 2: Alpha-Beta, 3: Expected Minimax): ")
-        if alg_choice in ['1', '2', '3']:
+        alg_choice = input("Select Algorithm (1: Minimax, 2: Alpha-Beta, 3: Expected Minimax, 4: Monte Carlo Tree Search): ")
+        if alg_choice in ['1', '2', '3', '4']:
             algorithm = algorithm_map.get(alg_choice, 'MINIMAX_ALPHA_BETA')
             print(f"Algorithm is set to {algorithm}.")
         else:
@@ -73,7 +79,7 @@ def run_game():
     
     # Depth Selection
     try:
-        depth = int(input("Enter Search Depth K (e.g., 5): "))
+        depth = int(input("Enter Search Depth K (e.g., 5; for MCTS the playout cutoff): "))
         print(f"Depth set to {depth}.")
     except ValueError:
         depth = 7
@@ -97,6 +103,7 @@ def run_game():
     # Initialize
     game_board = create_board()
     game_over = False
+    record = GameRecord(algorithm, depth, current_player)
     
     while not game_over:
         print_board(game_board)
@@ -118,6 +125,7 @@ def run_game():
                         col = choice - 1  # Convert 1-based input to 0-based index
                         row = get_next_open_row(game_board, col)
                         game_board = drop_piece(game_board, row, col, HUMAN_PIECE)
+                        record.add_move(col)
                         break
                     else:
                         print(f"Invalid column. Please choose from {valid_displays}")
@@ -133,11 +141,13 @@ def run_game():
             print(f"AI chose column: {col + 1}")
             print(f"Time taken: {elapsed_time:.4f} seconds")
             
-            if algorithm == 'EXPECTIMINIMAX':
-                game_board = execute_stochastic_move(game_board, col, AI_PIECE)
+            landing_col = col
+            if algorithm in STOCHASTIC_ALGORITHMS:
+                game_board, landing_col = execute_stochastic_move(game_board, col, AI_PIECE)
             else:
                 row = get_next_open_row(game_board, col)
                 game_board = drop_piece(game_board, row, col, AI_PIECE)
+            record.add_move(col, landing_col, elapsed_time)
         
         # Check for game end
         game_over = is_terminal_node(game_board)
@@ -145,6 +155,9 @@ def run_game():
 
 
     # --- GAME ENDING ---
+    if RECORD_FILE:
+        with GameRecordWriter(RECORD_FILE) as writer:
+            writer.write(record)
     print("\n\n--- GAME OVER ---")
     print_board(game_board)
     
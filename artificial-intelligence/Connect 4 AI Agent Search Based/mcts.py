@@ -0,0 +1,291 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from game import (
+    AI_PIECE, HUMAN_PIECE, Board,
+    get_valid_locations, get_next_open_row, drop_piece, board_key
+)
+from bitboard import count_fours
+import ai_agent
+from ai_agent import roll_landing_col
+
+# ----------------------------------------------------------------------
+# MONTE CARLO TREE SEARCH (UCT) WITH THE STOCHASTIC DROP MODEL
+# ----------------------------------------------------------------------
+# Rewards are always from the AI's point of view: 1 = AI wins, 0 = Human wins, 0.5 = draw.
+# AI moves go through a chance node: the intended column can slip to a neighbour
+# (get_probabilities), and a piece that slips into a full column is lost.
+
+LOST_PIECE = -1          # Chance outcome key when the piece lands in a full column
+DEFAULT_EXPLORATION = 1.4
+EVAL_SCALE = 200.0       # Logistic scale mapping a 'LITE' score to an expected reward
+
+class Node:
+    """Decision node: `piece` is the player to move on `board`."""
+    __slots__ = ('board', 'piece', 'children', 'untried', 'visits', 'value', 'virtual')
+
+    def __init__(self, board: Board, piece: int):
+        self.board = board
+        self.piece = piece
+        self.children: Dict[int, 'ChanceNode | Node'] = {}
+        self.untried: List[int] = get_valid_locations(board)
+        self.visits = 0
+        self.value = 0.0
+        self.virtual = 0  # In-flight playouts through this node (tree-parallel search)
+
+    def mean(self) -> float:
+        return self.value / self.visits if self.visits else 0.5
+
+class ChanceNode:
+    """The AI's intended column; children are keyed by landing column."""
+    __slots__ = ('col', 'children', 'visits', 'value', 'virtual')
+
+    def __init__(self, col: int):
+        self.col = col
+        self.children: Dict[int, Node] = {}
+        self.visits = 0
+        self.value = 0.0
+        self.virtual = 0
+
+    def mean(self) -> float:
+        return self.value / self.visits if self.visits else 0.5
+
+def land_piece(board: Board, intended_col: int, rand: float) -> Tuple[int, Board]:
+    """Applies a stochastic AI drop. Returns (landing key, new board)."""
+    landing_col = roll_landing_col(intended_col, rand)
+    row = get_next_open_row(board, landing_col)
+    if row is None:
+        return LOST_PIECE, board
+    return landing_col, drop_piece(board, row, landing_col, AI_PIECE)
+
+def final_reward(board: Board) -> float:
+    ai_score, human_score = count_fours(board)
+    if ai_score > human_score: return 1.0
+    if human_score > ai_score: return 0.0
+    return 0.5
+
+class MCTS:
+    """
+    Anytime UCT search.
+    playout: 'RANDOM' plays uniformly random moves to the end of the game;
+             'LITE' stops after `cutoff_depth` random plies and scores the position
+             with BoardEvaluator 'LITE' (squashed to [0, 1]).
+    The tree is kept between moves and re-rooted when the new position was already explored.
+    """
+    def __init__(self, exploration: float = DEFAULT_EXPLORATION, playout: str = 'LITE',
+                 cutoff_depth: int = 8, seed: Optional[int] = None):
+        if playout not in ('RANDOM', 'LITE'):
+            raise ValueError(f"Unknown playout policy: {playout!r}")
+        self.exploration = exploration
+        self.playout = playout
+        self.cutoff_depth = cutoff_depth
+        self.rng = random.Random(seed)
+        self.root: Optional[Node] = None
+        self.playouts = 0
+
+    # --- TREE REUSE ---
+    def set_root(self, board: Board):
+        """Re-roots on an explored descendant of the old root, or starts a new tree."""
+        key = board_key(board)
+        reused = self._find_descendant(self.root, key, max_depth=4) if self.root else None
+        self.root = reused if reused is not None else Node(board, AI_PIECE)
+
+    def _find_descendant(self, node, key, max_depth: int) -> Optional[Node]:
+        if isinstance(node, Node) and node.piece == AI_PIECE and board_key(node.board) == key:
+            return node
+        if max_depth == 0:
+            return None
+        for child in node.children.values():
+            found = self._find_descendant(child, key, max_depth - 1)
+            if found is not None:
+                return found
+        return None
+
+    # --- SEARCH ---
+    def search(self, board: Board, time_budget: float, max_playouts: Optional[int] = None) -> Tuple[float, int]:
+        """Runs playouts until the time budget (or playout cap) is used. Returns (expected reward, best col)."""
+        self.set_root(board)
+        deadline = time.time() + time_budget
+        self.playouts = 0
+        while time.time() < deadline and (max_playouts is None or self.playouts < max_playouts):
+            self.run_playout()
+            self.playouts += 1
+        return self.best_move()
+
+    def best_move(self) -> Tuple[float, int]:
+        """Most visited root column (the robust child) and its mean reward."""
+        if not self.root.children:
+            return 0.5, get_valid_locations(self.root.board)[0]
+        col, child = max(self.root.children.items(), key=lambda item: item[1].visits)
+        return child.mean(), col
+
+    def root_statistics(self) -> List[Tuple[int, int, float]]:
+        """(col, visits, mean reward) for every expanded root column."""
+        return [(col, child.visits, child.mean()) for col, child in sorted(self.root.children.items())]
+
+    def run_playout(self):
+        path, node = self._select_path()
+
+        # 3. SIMULATION
+        reward = self.simulate(node.board, node.piece)
+
+        # 4. BACKPROPAGATION
+        for visited in path:
+            visited.visits += 1
+            visited.value += reward
+
+    def _select_path(self) -> Tuple[list, Node]:
+        """Selection and expansion. Returns the visited path and the leaf to simulate from."""
+        path = [self.root]
+        node = self.root
+        while True:
+            if not node.untried and not node.children:
+                break  # Board full
+            if node.untried:
+                col = node.untried.pop(self.rng.randrange(len(node.untried)))
+                node = self._expand(node, col, path)
+                break
+            col = self._select(node)
+            node = self._descend(node, col, path)
+        return path, node
+
+    def _select(self, node: Node) -> int:
+        log_visits = math.log(node.visits)
+        best_col, best_ucb = None, -math.inf
+        for col, child in node.children.items():
+            mean = child.mean() if node.piece == AI_PIECE else 1.0 - child.mean()
+            ucb = mean + self.exploration * math.sqrt(log_visits / child.visits)
+            if ucb > best_ucb:
+                best_col, best_ucb = col, ucb
+        return best_col
+
+    def _descend(self, node: Node, col: int, path: list) -> Node:
+        child = node.children[col]
+        path.append(child)
+        if node.piece == HUMAN_PIECE:
+            return child
+        # Chance node: sample where the AI piece lands
+        landing, new_board = land_piece(node.board, col, self.rng.random())
+        next_node = child.children.get(landing)
+        if next_node is None:
+            next_node = Node(new_board, HUMAN_PIECE)
+            child.children[landing] = next_node
+        path.append(next_node)
+        return next_node
+
+    def _expand(self, node: Node, col: int, path: list) -> Node:
+        if node.piece == HUMAN_PIECE:
+            child = Node(drop_piece(node.board, get_next_open_row(node.board, col), col, HUMAN_PIECE), AI_PIECE)
+            node.children[col] = child
+            path.append(child)
+            return child
+        node.children[col] = ChanceNode(col)
+        return self._descend(node, col, path)
+
+    # --- PLAYOUT POLICY ---
+    def simulate(self, board: Board, piece: int, rng: Optional[random.Random] = None) -> float:
+        rng = rng or self.rng
+        board = [row[:] for row in board]  # Private copy, mutated in place
+        plies = 0
+        while True:
+            valid = get_valid_locations(board)
+            if not valid:
+                return final_reward(board)
+            if self.playout == 'LITE' and plies >= self.cutoff_depth:
+                score = ai_agent.get_evaluator().evaluate(board, scoring_mode='LITE')
+                return 1.0 / (1.0 + math.exp(-max(-50.0, min(50.0, score / EVAL_SCALE))))
+
+            col = rng.choice(valid)
+            if piece == AI_PIECE:
+                col = roll_landing_col(col, rng.random())
+            row = get_next_open_row(board, col)
+            if row is not None:
+                board[row][col] = piece
+            piece = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+            plies += 1
+
+# ----------------------------------------------------------------------
+# PARALLEL MCTS
+# ----------------------------------------------------------------------
+
+VIRTUAL_LOSS = 1  # Pretend-lost playouts added per in-flight visit
+
+class TreeParallelMCTS(MCTS):
+    """
+    Shared-tree MCTS: several threads grow one tree under a lock.
+    Virtual loss makes a node look worse to its chooser while playouts are still in flight
+    through it, so concurrent threads spread over different branches.
+    Note: playouts are pure Python, so the GIL limits the speedup to lock-free waiting.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+
+    def search(self, board: Board, time_budget: float, max_playouts: Optional[int] = None, workers: int = 4) -> Tuple[float, int]:
+        self.set_root(board)
+        deadline = time.time() + time_budget
+        self.playouts = 0
+
+        def worker(seed: int):
+            rng = random.Random(seed)
+            while time.time() < deadline:
+                with self.lock:
+                    if max_playouts is not None and self.playouts >= max_playouts:
+                        return
+                    self.playouts += 1
+                    path, node = self._select_path()
+                    for visited in path:
+                        visited.virtual += VIRTUAL_LOSS
+                reward = self.simulate(node.board, node.piece, rng)
+                with self.lock:
+                    for visited in path:
+                        visited.virtual -= VIRTUAL_LOSS
+                        visited.visits += 1
+                        visited.value += reward
+
+        threads = [threading.Thread(target=worker, args=(self.rng.random(),)) for _ in range(workers)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        return self.best_move()
+
+    def _select(self, node: Node) -> int:
+        # UCT where every virtual visit counts as a loss for the player choosing the child
+        log_visits = math.log(node.visits + node.virtual)
+        best_col, best_ucb = None, -math.inf
+        for col, child in node.children.items():
+            n = child.visits + child.virtual
+            wins = child.value if node.piece == AI_PIECE else child.visits - child.value
+            ucb = wins / n + self.exploration * math.sqrt(log_visits / n)
+            if ucb > best_ucb:
+                best_col, best_ucb = col, ucb
+        return best_col
+
+def _root_worker(job: Tuple[Board, float, int, str, int]) -> Tuple[List[Tuple[int, int, float]], int]:
+    board, time_budget, cutoff_depth, playout, seed = job
+    engine = MCTS(playout=playout, cutoff_depth=cutoff_depth, seed=seed)
+    engine.search(board, time_budget)
+    return engine.root_statistics(), engine.playouts
+
+def root_parallel_search(board: Board, time_budget: float, workers: int = 4, cutoff_depth: int = 8,
+                         playout: str = 'LITE', seed: int = 0) -> Tuple[float, int, List[Tuple[int, int, float]], int]:
+    """
+    Root-parallel MCTS: independent trees (one per process, different seeds) searched
+    for the same budget, with visits and rewards summed per root column.
+    Returns (mean reward of best col, best col, merged (col, visits, mean) stats, total playouts).
+    """
+    jobs = [(board, time_budget, cutoff_depth, playout, seed + i) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_root_worker, jobs))
+
+    visits: Dict[int, int] = {}
+    value: Dict[int, float] = {}
+    for stats, _ in results:
+        for col, n, mean in stats:
+            visits[col] = visits.get(col, 0) + n
+            value[col] = value.get(col, 0.0) + mean * n
+    merged = [(col, visits[col], value[col] / visits[col]) for col in sorted(visits)]
+    best_col, _, best_mean = max(merged, key=lambda stat: stat[1])
+    return best_mean, best_col, merged, sum(playouts for _, playouts in results)
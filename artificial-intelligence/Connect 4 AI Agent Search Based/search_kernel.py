@@ -0,0 +1,297 @@
+import weakref
+from typing import List, Tuple
+import numpy as np
+from game import EMPTY, AI_PIECE, HUMAN_PIECE, Board, get_next_open_row
+from heuristic import BoardEvaluator
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Without Numba the kernel runs as plain (slow) Python, for checking only."""
+        return lambda func: func
+
+# ----------------------------------------------------------------------
+# ARRAY-BACKED ALPHA-BETA KERNEL
+# ----------------------------------------------------------------------
+# Same search as ai_agent.minimax_alphabeta with 'FULL' scoring: move order, threat-space
+# shortcuts and forced-move extensions, mirror-symmetry reduction, terminal scoring and
+# BoardEvaluator's evaluation (including the order of its float additions), so scores,
+# moves and node counts match the recursive search exactly.
+# The board is a flat int8 array (cell r * cols + c) changed in place with make/unmake,
+# and the recursion is an explicit stack of per-ply arrays. Under Numba it is compiled
+# to machine code (cached on disk after the first run).
+# No eval cache, console tree, GUI callbacks or deadline: ai_agent only uses it for
+# headless searches without a time budget.
+
+INF = np.inf
+
+class KernelTables:
+    """Evaluator data as arrays, for one board size and weight set (see tables_for)."""
+    def __init__(self, evaluator: BoardEvaluator):
+        rows, cols = evaluator.rows, evaluator.cols
+        self.rows, self.cols = rows, cols
+        self.windows = np.array([[r * cols + c for r, c in window] for window in evaluator.window_indices], dtype=np.int32)
+        self.positional = np.array([w for row in evaluator.positional_weights for w in row], dtype=np.float64)
+        weights = evaluator.weights
+        self.weights = np.array([weights['three'], weights['two'], weights['fork'], weights['parity']], dtype=np.float64)
+
+        # Cell -> windows through it, as offsets into one flat id array (CSR layout)
+        cell_windows: List[List[int]] = [[] for _ in range(rows * cols)]
+        for window_id, window in enumerate(self.windows):
+            for cell in window:
+                cell_windows[cell].append(window_id)
+        self.cell_window_start = np.zeros(rows * cols + 1, dtype=np.int32)
+        self.cell_window_start[1:] = np.cumsum([len(ids) for ids in cell_windows])
+        self.cell_window_ids = np.array([w for ids in cell_windows for w in ids], dtype=np.int32)
+
+# Keyed on the evaluator itself (not its id, which a new evaluator can reuse) and
+# dropped with it, e.g. after set_board_size or a weights reload
+_TABLES: "weakref.WeakKeyDictionary[BoardEvaluator, KernelTables]" = weakref.WeakKeyDictionary()
+
+def tables_for(evaluator: BoardEvaluator) -> KernelTables:
+    tables = _TABLES.get(evaluator)
+    if tables is None:
+        tables = _TABLES[evaluator] = KernelTables(evaluator)
+    return tables
+
+@njit(cache=True)
+def _evaluate(board, rows, cols, windows, positional, weights, ai_count, human_count, ai_order, human_order):
+    """BoardEvaluator.evaluate(board, 'FULL'); ai_count/human_count must be all zero on entry."""
+    score = 0.0
+    for i in range(rows * cols):
+        if board[i] == AI_PIECE:
+            score += positional[i]
+        elif board[i] == HUMAN_PIECE:
+            score -= positional[i]
+
+    three, two, fork, parity = weights[0], weights[1], weights[2], weights[3]
+    threats = 0.0
+    ai_fours = human_fours = 0
+    n_ai = n_human = 0
+    for w in range(windows.shape[0]):
+        a = h = e = 0
+        for k in range(4):
+            piece = board[windows[w, k]]
+            if piece == AI_PIECE: a += 1
+            elif piece == HUMAN_PIECE: h += 1
+            else: e += 1
+        if a == 4:
+            ai_fours += 1
+        elif h == 4:
+            human_fours += 1
+        elif a == 3 and e == 1:
+            threats += three
+            for k in range(4):
+                cell = windows[w, k]
+                if board[cell] == EMPTY:
+                    if ai_count[cell] == 0:
+                        ai_order[n_ai] = cell  # Dict insertion order in the reference
+                        n_ai += 1
+                    ai_count[cell] += 1
+        elif h == 3 and e == 1:
+            threats -= three
+            for k in range(4):
+                cell = windows[w, k]
+                if board[cell] == EMPTY:
+                    if human_count[cell] == 0:
+                        human_order[n_human] = cell
+                        n_human += 1
+                    human_count[cell] += 1
+        elif a == 2 and e == 2:
+            threats += two
+        elif h == 2 and e == 2:
+            threats -= two
+
+    if ai_fours or human_fours:
+        if ai_fours > human_fours: threats = 1000000.0
+        elif human_fours > ai_fours: threats = -1000000.0
+        else: threats = 0.0
+    else:
+        for j in range(n_ai):
+            cell = ai_order[j]
+            if ai_count[cell] >= 2: threats += fork
+            if (cell // cols) % 2 != 0: threats += parity
+        for j in range(n_human):
+            if human_count[human_order[j]] >= 2: threats -= fork
+
+    for j in range(n_ai): ai_count[ai_order[j]] = 0
+    for j in range(n_human): human_count[human_order[j]] = 0
+    return score + threats
+
+@njit(cache=True)
+def _completes_four(board, cell, piece, windows, cell_window_start, cell_window_ids):
+    """True if `piece` owns the other three cells of a window through `cell`."""
+    for j in range(cell_window_start[cell], cell_window_start[cell + 1]):
+        w = cell_window_ids[j]
+        owned = 0
+        for k in range(4):
+            other = windows[w, k]
+            if other != cell and board[other] == piece:
+                owned += 1
+        if owned == 3:
+            return True
+    return False
+
+@njit(cache=True)
+def _search(board, open_row, rows, cols, depth, maximizing, use_pruning, threat_search, use_symmetry, max_extensions,
+            win_score, windows, positional, weights, cell_window_start, cell_window_ids):
+    """minimax_alphabeta(board, depth, -inf, inf, maximizing, ...). Returns (value, nodes)."""
+    plies = depth + max_extensions + 1
+    moves = np.zeros((plies, cols), dtype=np.int32)
+    n_moves = np.zeros(plies, dtype=np.int32)
+    index = np.zeros(plies, dtype=np.int32)
+    depth_left = np.zeros(plies, dtype=np.int32)
+    extensions = np.zeros(plies, dtype=np.int32)
+    maxing = np.zeros(plies, dtype=np.bool_)
+    alpha = np.empty(plies, dtype=np.float64)
+    beta = np.empty(plies, dtype=np.float64)
+    value = np.empty(plies, dtype=np.float64)
+    ai_cols = np.empty(cols, dtype=np.int32)
+    human_cols = np.empty(cols, dtype=np.int32)
+    ai_count = np.zeros(rows * cols, dtype=np.int32)
+    human_count = np.zeros(rows * cols, dtype=np.int32)
+    ai_order = np.empty(rows * cols, dtype=np.int32)
+    human_order = np.empty(rows * cols, dtype=np.int32)
+
+    ply = 0
+    depth_left[0], extensions[0], maxing[0] = depth, max_extensions, maximizing
+    alpha[0], beta[0] = -INF, INF
+    nodes = 0
+    result = 0.0
+    descend = True
+
+    while True:
+        if descend:
+            nodes += 1
+            n = 0
+            for c in range(cols):
+                if open_row[c] >= 0:
+                    moves[ply, n] = c
+                    n += 1
+
+            if depth_left[ply] == 0 or n == 0:
+                # --- LEAF ---
+                result = _evaluate(board, rows, cols, windows, positional, weights,
+                                   ai_count, human_count, ai_order, human_order)
+                if n == 0:
+                    if result >= 10000: result = win_score
+                    elif result <= -10000: result = -win_score
+                    else: result = 0.0
+                if ply == 0:
+                    return result, nodes
+                ply -= 1
+                c = moves[ply, index[ply]]
+                open_row[c] += 1
+                board[open_row[c] * cols + c] = EMPTY
+                descend = False
+                continue
+            else:
+                # --- THREAT-SPACE SHORTCUTS (forced_moves) ---
+                if use_pruning and threat_search:
+                    n_ai = n_human = 0
+                    for c in range(cols):
+                        if open_row[c] >= 0:
+                            cell = open_row[c] * cols + c
+                            if _completes_four(board, cell, AI_PIECE, windows, cell_window_start, cell_window_ids):
+                                ai_cols[n_ai] = c
+                                n_ai += 1
+                            if _completes_four(board, cell, HUMAN_PIECE, windows, cell_window_start, cell_window_ids):
+                                human_cols[n_human] = c
+                                n_human += 1
+                    own, n_own = (ai_cols, n_ai) if maxing[ply] else (human_cols, n_human)
+                    opponent, n_opponent = (human_cols, n_human) if maxing[ply] else (ai_cols, n_ai)
+                    if n_own:
+                        moves[ply, 0] = own[0]
+                        n = 1
+                    elif n_opponent:
+                        for j in range(n_opponent):
+                            moves[ply, j] = opponent[j]
+                        n = n_opponent
+                        if n_opponent == 1 and extensions[ply] > 0:
+                            depth_left[ply] += 1  # Forced reply: search it without spending depth
+                            extensions[ply] -= 1
+
+                # --- MIRROR SYMMETRY (search_columns) ---
+                symmetric = use_symmetry
+                if use_symmetry:
+                    for r in range(rows):
+                        for c in range(cols // 2):
+                            if board[r * cols + c] != board[r * cols + cols - 1 - c]:
+                                symmetric = False
+                if symmetric:
+                    kept = 0
+                    for j in range(n):
+                        if moves[ply, j] <= cols - 1 - moves[ply, j]:
+                            moves[ply, kept] = moves[ply, j]
+                            kept += 1
+                    n = kept
+
+                n_moves[ply] = n
+                index[ply] = 0
+                value[ply] = -INF if maxing[ply] else INF
+        else:
+            # --- BACK UP THE CHILD'S RESULT ---
+            cut = False
+            if maxing[ply]:
+                if result > value[ply]: value[ply] = result
+                if use_pruning:
+                    alpha[ply] = max(alpha[ply], value[ply])
+                    cut = alpha[ply] >= beta[ply]
+            else:
+                if result < value[ply]: value[ply] = result
+                if use_pruning:
+                    beta[ply] = min(beta[ply], value[ply])
+                    cut = alpha[ply] >= beta[ply]
+            index[ply] += 1
+            if cut or index[ply] == n_moves[ply]:
+                result = value[ply]
+                if ply == 0:
+                    return result, nodes
+                ply -= 1
+                c = moves[ply, index[ply]]
+                open_row[c] += 1
+                board[open_row[c] * cols + c] = EMPTY
+                continue
+
+        # --- MAKE THE NEXT MOVE AND DESCEND ---
+        c = moves[ply, index[ply]]
+        board[open_row[c] * cols + c] = AI_PIECE if maxing[ply] else HUMAN_PIECE
+        open_row[c] -= 1
+        depth_left[ply + 1] = depth_left[ply] - 1
+        extensions[ply + 1] = extensions[ply]
+        maxing[ply + 1] = not maxing[ply]
+        alpha[ply + 1], beta[ply + 1] = alpha[ply], beta[ply]
+        ply += 1
+        descend = True
+
+def score_columns(board: Board, cols: List[int], depth: int, use_pruning: bool, threat_search: bool, use_symmetry: bool,
+                  max_extensions: int, win_score: float, evaluator: BoardEvaluator) -> Tuple[List[float], int]:
+    """
+    Root children of _find_best_move: the AI drops into each column and the Human replies,
+    searched to `depth` with a full window. Returns (scores, nodes).
+    """
+    tables = tables_for(evaluator)
+    rows, n_cols = len(board), len(board[0])
+    flat = np.array(board, dtype=np.int8).ravel()
+    open_row = np.full(n_cols, -1, dtype=np.int32)  # -1 = full column
+    for c in range(n_cols):
+        row = get_next_open_row(board, c)
+        if row is not None:
+            open_row[c] = row
+    scores, nodes = [], 0
+    for col in cols:
+        cell = open_row[col] * n_cols + col
+        flat[cell] = AI_PIECE
+        open_row[col] -= 1
+        score, searched = _search(flat, open_row, rows, n_cols, depth, False, use_pruning, threat_search, use_symmetry, max_extensions,
+                                  win_score, tables.windows, tables.positional, tables.weights,
+                                  tables.cell_window_start, tables.cell_window_ids)
+        open_row[col] += 1
+        flat[cell] = EMPTY
+        scores.append(float(score))
+        nodes += int(searched)
+    return scores, nodes
@@ -0,0 +1,207 @@
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+# ----------------------------------------------------------------------
+# SEARCH TREE TRACES (.c4t)
+# ----------------------------------------------------------------------
+# A TreeRecorder is passed to find_best_move as the gui_callback. Instead of shipping every
+# node to the viewer process while the search runs, it appends the events to flat arrays,
+# and the finished trace is saved once and replayed offline (gui.py tree window, or
+# `python gui.py --replay FILE`).
+#
+# File layout (little-endian):
+#   header   b"C4TR", u8 version, u32 node count, u32 event count
+#   nodes    i32 parent[n], u8 slot[n], u8 level[n], u8 flags[n]
+#   events   u8 kind[e], u32 node[e], f32 alpha[e], f32 beta[e], f32 value[e]
+# Node ids are not stored as strings: the id of a node is its parent's id plus "." + slot.
+# Absent values are NaN. Nodes are numbered in order of their first event.
+
+MAGIC = b"C4TR"
+VERSION = 1
+HEADER = struct.Struct("<4sBII")
+ALL_LEVELS = 255  # gui_depth_limit that records the whole tree (levels are stored as u8)
+
+VISIT, UPDATE, PRUNE, RETURN = range(4)
+EVENT_KINDS = {'visit': VISIT, 'update': UPDATE, 'prune': PRUNE, 'return': RETURN}
+FLAG_MAX, FLAG_CHANCE = 1, 2
+
+NODE_COLUMNS = (('parent', 'i'), ('slot', 'B'), ('level', 'B'), ('flags', 'B'))
+EVENT_COLUMNS = (('kind', 'B'), ('node', 'I'), ('alpha', 'f'), ('beta', 'f'), ('value', 'f'))
+NAN = float('nan')
+
+class TreeTrace:
+    """Column arrays of one search tree (see the file layout above)."""
+    def __init__(self):
+        for name, code in NODE_COLUMNS + EVENT_COLUMNS:
+            setattr(self, name, array(code))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.parent)
+
+    @property
+    def event_count(self) -> int:
+        return len(self.kind)
+
+    def node_id(self, node: int) -> str:
+        parts = []
+        while self.parent[node] >= 0:
+            parts.append(str(self.slot[node]))
+            node = self.parent[node]
+        return ".".join(["root"] + parts[::-1])
+
+    def children(self) -> List[List[int]]:
+        """Child lists of every node, in visiting order."""
+        children: List[List[int]] = [[] for _ in range(self.node_count)]
+        for node, parent in enumerate(self.parent):
+            if parent >= 0:
+                children[parent].append(node)
+        return children
+
+    # --- FILE I/O ---
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.node_count, self.event_count))
+            for name, _ in NODE_COLUMNS + EVENT_COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder == 'big':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> 'TreeTrace':
+        trace = cls()
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not a version {VERSION} tree trace")
+            magic, version, nodes, events = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} tree trace")
+            for columns, count in ((NODE_COLUMNS, nodes), (EVENT_COLUMNS, events)):
+                for name, _ in columns:
+                    column = getattr(trace, name)
+                    try:
+                        column.fromfile(f, count)
+                    except EOFError:
+                        raise ValueError(f"{path} is truncated") from None
+                    if sys.byteorder == 'big':
+                        column.byteswap()
+        return trace
+
+# ----------------------------------------------------------------------
+# RECORDING
+# ----------------------------------------------------------------------
+
+class TreeRecorder(TreeTrace):
+    """
+    gui_callback that records the search instead of drawing it.
+    Pass gui_depth_limit=ALL_LEVELS to capture every node. `pump` (e.g. the GUI's event
+    loop) is called every `pump_every` events so the window stays responsive.
+    """
+    def __init__(self, pump=None, pump_every: int = 4096):
+        super().__init__()
+        self.index: Dict[str, int] = {}
+        self.pump = pump
+        self.pump_every = pump_every
+
+    def _node(self, node_id: str, data: dict) -> int:
+        node = self.index.get(node_id)
+        if node is None:
+            node = self.index[node_id] = len(self.parent)
+            parent_id, _, slot = node_id.rpartition(".")
+            self.parent.append(self.index[parent_id] if parent_id in self.index else -1)
+            self.slot.append(int(slot) if parent_id else 0)
+            self.level.append(min(data.get('level', 0), ALL_LEVELS))
+            self.flags.append((FLAG_MAX if data.get('maximizing') else 0)
+                              | (FLAG_CHANCE if data.get('node_type') == 'chance' else 0))
+        return node
+
+    def __call__(self, data: Optional[dict]):
+        if data is None:
+            return
+        kind = EVENT_KINDS[data['type']]
+        self.kind.append(kind)
+        self.node.append(self._node(data['id'], data))
+        self.alpha.append(data.get('alpha', NAN))
+        self.beta.append(data.get('beta', NAN))
+        value = data.get('score') if kind == RETURN else data.get('temp_val')
+        self.value.append(NAN if value is None else value)
+        if self.pump is not None and len(self.kind) % self.pump_every == 0:
+            self.pump()
+
+    def reset(self):
+        self.index.clear()
+        TreeTrace.__init__(self)
+
+# ----------------------------------------------------------------------
+# REPLAY WITH SEEK
+# ----------------------------------------------------------------------
+
+class TraceReplay:
+    """
+    Node states (visited, alpha, beta, score, pruned) after the first `step` events.
+    Seeking forward applies the events in between; seeking backward restarts from the
+    nearest snapshot, taken every `snapshot_every` events (at most ~64 per trace).
+    """
+    def __init__(self, trace: TreeTrace):
+        self.trace = trace
+        self.children = trace.children()
+        n = trace.node_count
+        self.snapshot_every = max(4096, trace.event_count // 64 + 1)
+        self.snapshots: Dict[int, tuple] = {}
+        self.step = 0
+        self.visited = bytearray(n)
+        self.pruned = bytearray(n)
+        self.score = array('f', [NAN]) * n
+        self.alpha = array('f', [NAN]) * n
+        self.beta = array('f', [NAN]) * n
+        self._snapshot()
+
+    def _snapshot(self):
+        self.snapshots[self.step] = (bytes(self.visited), bytes(self.pruned),
+                                     array('f', self.score), array('f', self.alpha), array('f', self.beta))
+
+    def _restore(self, step: int):
+        visited, pruned, score, alpha, beta = self.snapshots[step]
+        self.visited[:], self.pruned[:] = visited, pruned
+        self.score, self.alpha, self.beta = array('f', score), array('f', alpha), array('f', beta)
+        self.step = step
+
+    def seek(self, step: int):
+        trace = self.trace
+        step = max(0, min(step, trace.event_count))
+        if step < self.step:
+            self._restore(max(s for s in self.snapshots if s <= step))
+        kinds, nodes, values = trace.kind, trace.node, trace.value
+        for i in range(self.step, step):
+            node, kind = nodes[i], kinds[i]
+            if kind == VISIT:
+                self.visited[node] = 1
+            elif kind == PRUNE:
+                self.pruned[node] = 1
+            elif kind == RETURN:
+                self.score[node] = values[i]
+            if kind != PRUNE and trace.alpha[i] == trace.alpha[i]:  # NaN = not sent
+                self.alpha[node], self.beta[node] = trace.alpha[i], trace.beta[i]
+            if (i + 1) % self.snapshot_every == 0 and i + 1 not in self.snapshots:
+                self.step = i + 1
+                self._snapshot()
+        self.step = step
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect a search tree trace")
+    parser.add_argument('path')
+    args = parser.parse_args()
+    trace = TreeTrace.load(args.path)
+    kinds = {name: trace.kind.count(kind) for name, kind in EVENT_KINDS.items()}
+    depth = max(trace.level, default=0)
+    print(f"{trace.node_count} nodes, {trace.event_count} events, deepest level {depth}")
+    print("  " + "  ".join(f"{name}: {count}" for name, count in kinds.items()))
+
+if __name__ == '__main__':
+    main()
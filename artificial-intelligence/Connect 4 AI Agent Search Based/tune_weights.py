@@ -0,0 +1,240 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Tuple
+from game import AI_PIECE, HUMAN_PIECE, EMPTY, Board, create_board, get_valid_locations, get_next_open_row, drop_piece
+from heuristic import BoardEvaluator, DEFAULT_WEIGHTS, WEIGHTS_FILE, load_weights, save_weights
+from bitboard import count_fours
+from game_record import GameRecord, GameRecordWriter, GameRecordReader, replay
+import ai_agent
+
+# ----------------------------------------------------------------------
+# HEURISTIC WEIGHT TUNING (SPSA ON A TEXEL-STYLE LOSS)
+# ----------------------------------------------------------------------
+# Data: positions replayed from binary game records (game_record.py), each labelled with
+#   the final result of its game from the AI's side (1 = AI won, 0.5 = draw, 0 = Human won).
+# Loss: mean squared error between sigmoid('FULL' evaluation / EVAL_SCALE) and the label.
+# Optimizer: SPSA. Each iteration perturbs every weight at once by a random +-c step and
+#   estimates the gradient from two loss evaluations, both spread over the process pool.
+# Weights are tuned as multipliers of DEFAULT_WEIGHTS, so 5 and 5000 move on the same scale.
+# Positions whose fours already decide the evaluation (+-1000000) carry no signal and are skipped.
+
+EVAL_SCALE = 400.0
+CHECKPOINT_FILE = "tune_checkpoint.json"
+
+# --- SPSA gains (Spall's standard exponents) ---
+SPSA_A = 10.0      # Step size numerator
+SPSA_C = 0.1       # Perturbation size (relative)
+SPSA_STABILITY = 10  # Step size offset; fixed so a resumed run follows the same schedule
+SPSA_ALPHA = 0.602
+SPSA_GAMMA = 0.101
+MAX_MULTIPLIER = 10.0
+
+# ----------------------------------------------------------------------
+# TRAINING DATA
+# ----------------------------------------------------------------------
+
+def game_result(board: Board) -> float:
+    ai_fours, human_fours = count_fours(board)
+    if ai_fours > human_fours: return 1.0
+    if human_fours > ai_fours: return 0.0
+    return 0.5
+
+def load_positions(paths: List[str], min_ply: int, max_positions: int, seed: int) -> List[Tuple[Board, float]]:
+    """Labelled positions from record files, sampled down to max_positions (reproducibly)."""
+    positions = []
+    for path in paths:
+        with GameRecordReader(path) as reader:
+            for record in reader:
+                boards = list(replay(record, reader.rows, reader.cols))
+                if not boards:
+                    continue
+                label = game_result(boards[-1])
+                for ply, board in enumerate(boards, start=1):
+                    if ply < min_ply:
+                        continue
+                    ai_fours, human_fours = count_fours(board)
+                    if ai_fours == human_fours:
+                        positions.append((board, label))
+    rng = random.Random(seed)
+    if len(positions) > max_positions:
+        positions = rng.sample(positions, max_positions)
+    return positions
+
+def swap_pieces(board: Board) -> Board:
+    swap = {AI_PIECE: HUMAN_PIECE, HUMAN_PIECE: AI_PIECE, EMPTY: EMPTY}
+    return [[swap[cell] for cell in row] for row in board]
+
+def selfplay_game(job: Tuple[int, int, float]) -> GameRecord:
+    """
+    Alpha-Beta against itself at `depth`, with a random move `epsilon` of the time for variety.
+    The Human side searches on the piece-swapped board.
+    """
+    seed, depth, epsilon = job
+    rng = random.Random(seed)
+    ai_agent.USE_OPENING_BOOK = False
+    record = GameRecord('MINIMAX_ALPHA_BETA', depth, rng.choice((HUMAN_PIECE, AI_PIECE)))
+    board = create_board()
+    piece = record.first_player
+    while True:
+        valid = get_valid_locations(board)
+        if not valid:
+            return record
+        start = time.time()
+        if rng.random() < epsilon:
+            col = rng.choice(valid)
+        else:
+            view = board if piece == AI_PIECE else swap_pieces(board)
+            _, col, _ = ai_agent.find_best_move(view, 'MINIMAX_ALPHA_BETA', depth, verbose=False)
+        board = drop_piece(board, get_next_open_row(board, col), col, piece)
+        record.add_move(col, elapsed=time.time() - start)
+        piece = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+
+def generate_selfplay(path: str, games: int, depth: int, epsilon: float, seed: int, workers: int):
+    jobs = [(seed * 1000003 + i, depth, epsilon) for i in range(games)]
+    with GameRecordWriter(path) as writer, Pool(workers) as pool:
+        for done, record in enumerate(pool.imap_unordered(selfplay_game, jobs), start=1):
+            writer.write(record)
+            print(f"  {done}/{games} self-play games", end="\r", file=sys.stderr)
+    print(file=sys.stderr)
+
+# ----------------------------------------------------------------------
+# PARALLEL LOSS
+# ----------------------------------------------------------------------
+
+_POSITIONS: List[Tuple[Board, float]] = []
+
+def _init_worker(positions: List[Tuple[Board, float]]):
+    global _POSITIONS
+    _POSITIONS = positions
+
+def _chunk_loss(job: Tuple[Dict[str, float], int, int]) -> float:
+    """Sum of squared errors over positions[start:stop] (runs in a worker)."""
+    weights, start, stop = job
+    evaluator = BoardEvaluator(weights=weights)
+    total = 0.0
+    for board, label in _POSITIONS[start:stop]:
+        x = max(-50.0, min(50.0, evaluator.evaluate(board) / EVAL_SCALE))
+        total += (1.0 / (1.0 + math.exp(-x)) - label) ** 2
+    return total
+
+def to_weights(names: List[str], theta: List[float]) -> Dict[str, float]:
+    return {name: DEFAULT_WEIGHTS[name] * t for name, t in zip(names, theta)}
+
+class LossFunction:
+    """Evaluates several weight vectors per pool round trip, each split into `chunks` slices."""
+    def __init__(self, pool: Pool, count: int, chunks: int):
+        self.pool = pool
+        self.count = count
+        step = -(-count // chunks)
+        self.bounds = [(start, min(count, start + step)) for start in range(0, count, step)]
+
+    def __call__(self, *weight_sets: Dict[str, float]) -> List[float]:
+        jobs = [(weights, start, stop) for weights in weight_sets for start, stop in self.bounds]
+        sums = self.pool.map(_chunk_loss, jobs)
+        n = len(self.bounds)
+        return [sum(sums[i * n:(i + 1) * n]) / self.count for i in range(len(weight_sets))]
+
+# ----------------------------------------------------------------------
+# SPSA WITH CHECKPOINTS
+# ----------------------------------------------------------------------
+
+def save_checkpoint(path: str, state: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)  # Atomic: an interruption never leaves a half-written checkpoint
+
+def tune(args) -> int:
+    names = list(DEFAULT_WEIGHTS)
+    if args.resume and os.path.exists(args.checkpoint):
+        with open(args.checkpoint, "r") as f:
+            state = json.load(f)
+        if state['names'] != names or state['seed'] != args.seed:
+            print(f"{args.checkpoint} was made with other weights or seed", file=sys.stderr)
+            return 1
+        print(f"Resuming from iteration {state['iteration']}", file=sys.stderr)
+    else:
+        start_weights = load_weights()
+        state = {'names': names, 'seed': args.seed, 'iteration': 0, 'history': [],
+                 'theta': [start_weights[name] / DEFAULT_WEIGHTS[name] for name in names]}
+
+    positions = load_positions(args.records, args.min_ply, args.max_positions, args.seed)
+    if not positions:
+        print("No usable positions in the record files", file=sys.stderr)
+        return 1
+    print(f"Positions: {len(positions)}  |  Workers: {args.workers}  |  Seed: {args.seed}", file=sys.stderr)
+
+    theta = state['theta']
+    with Pool(args.workers, initializer=_init_worker, initargs=(positions,)) as pool:
+        loss = LossFunction(pool, len(positions), args.workers * 4)
+        if not state['history']:
+            state['history'].append(loss(to_weights(names, theta))[0])
+            print(f"  iter    0  loss {state['history'][0]:.6f}", file=sys.stderr)
+
+        for k in range(state['iteration'], args.iterations):
+            # The perturbation depends only on (seed, k), so resumed runs repeat it exactly
+            rng = random.Random(args.seed * 1000003 + k)
+            delta = [rng.choice((-1.0, 1.0)) for _ in names]
+            a_k = SPSA_A / (k + 1 + SPSA_STABILITY) ** SPSA_ALPHA
+            c_k = SPSA_C / (k + 1) ** SPSA_GAMMA
+
+            plus = [max(0.0, t + c_k * d) for t, d in zip(theta, delta)]
+            minus = [max(0.0, t - c_k * d) for t, d in zip(theta, delta)]
+            loss_plus, loss_minus = loss(to_weights(names, plus), to_weights(names, minus))
+            theta = [min(MAX_MULTIPLIER, max(0.0, t - a_k * (loss_plus - loss_minus) / (2 * c_k * d)))
+                     for t, d in zip(theta, delta)]
+
+            state['theta'], state['iteration'] = theta, k + 1
+            if (k + 1) % args.report_every == 0 or k + 1 == args.iterations:
+                state['history'].append(loss(to_weights(names, theta))[0])
+                print(f"  iter {k + 1:>4}  loss {state['history'][-1]:.6f}", file=sys.stderr)
+            save_checkpoint(args.checkpoint, state)
+
+    weights = to_weights(names, theta)
+    save_weights(weights, args.output)
+    print(json.dumps(weights, indent=2))
+    print(f"Loss {state['history'][0]:.6f} -> {state['history'][-1]:.6f}; weights written to {args.output}", file=sys.stderr)
+    return 0
+
+# ----------------------------------------------------------------------
+# COMMAND LINE
+# ----------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the BoardEvaluator weights on recorded games")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('selfplay', help="Generate training games into a record file")
+    p.add_argument('output', help="Game record file (.c4r), appended to")
+    p.add_argument('--games', type=int, default=500)
+    p.add_argument('--depth', type=int, default=2)
+    p.add_argument('--epsilon', type=float, default=0.2, help="Probability of a random move")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workers', type=int, default=os.cpu_count())
+
+    p = sub.add_parser('tune', help="Run SPSA and write the tuned weights file")
+    p.add_argument('records', nargs='+', help="Game record files (.c4r)")
+    p.add_argument('--output', default=WEIGHTS_FILE, help="Weights file loaded by ai_agent at startup")
+    p.add_argument('--iterations', type=int, default=200)
+    p.add_argument('--min-ply', type=int, default=8, help="Skip the opening plies of every game")
+    p.add_argument('--max-positions', type=int, default=50000)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--workers', type=int, default=os.cpu_count())
+    p.add_argument('--report-every', type=int, default=10)
+    p.add_argument('--checkpoint', default=CHECKPOINT_FILE)
+    p.add_argument('--resume', action='store_true', help="Continue from the checkpoint")
+
+    args = parser.parse_args()
+    if args.command == 'selfplay':
+        generate_selfplay(args.output, args.games, args.depth, args.epsilon, args.seed, args.workers)
+    elif args.command == 'tune':
+        sys.exit(tune(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import hashlib
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = ".dataset_cache"  # Next to the text files
+CHUNK_SIZE = 1 << 20  # Bytes hashed per read
+
+
+def cache_paths(file_path):
+    """(features .npy, labels .npy, meta .json) of a text data file."""
+    folder, name = os.path.split(os.path.abspath(file_path))
+    stem = os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0])
+    return stem + ".features.npy", stem + ".labels.npy", stem + ".meta.json"
+
+
+def checksum(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def replace_file(path, write):
+    """
+    Calls write(f) on a temporary file next to `path`, then moves it into place. Arrays
+    memory-mapped from the old file keep its data instead of changing under their users.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        write(f)
+    os.replace(temporary, path)
+
+
+def write_meta(meta_path, meta):
+    replace_file(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+
+def convert(file_path):
+    """
+    Parses a CSV data file (features, then a one-character label) once and stores the
+    features as a float32 .npy and the labels as one byte each, with the source's checksum.
+    """
+    features_path, labels_path, meta_path = cache_paths(file_path)
+    os.makedirs(os.path.dirname(features_path), exist_ok=True)
+    # Stat first, then hash and parse the same bytes: a rewrite during the conversion leaves
+    # a stat that no longer matches, so is_fresh re-checks the file instead of trusting the cache
+    stat = os.stat(file_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    df = pd.read_csv(io.BytesIO(data), header=None)
+    features = np.ascontiguousarray(df.iloc[:, :-1].values, dtype=np.float32)
+    labels = df.iloc[:, -1].values.astype("S1")
+    replace_file(features_path, lambda f: np.save(f, features))
+    replace_file(labels_path, lambda f: np.save(f, labels.view(np.uint8)))
+    meta = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hashlib.sha256(data).hexdigest(),
+            "rows": features.shape[0], "columns": features.shape[1]}
+    write_meta(meta_path, meta)  # Last: the cache only counts as fresh once the arrays are in place
+
+
+def is_fresh(file_path):
+    """
+    True if the cache matches the text file. Same size and modification time is trusted;
+    otherwise the file is hashed, so a touched but unchanged file keeps its cache.
+    """
+    features_path, labels_path, meta_path = cache_paths(file_path)
+    if not all(os.path.exists(path) for path in (features_path, labels_path, meta_path)):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    stat = os.stat(file_path)
+    if (stat.st_size, stat.st_mtime_ns) == (meta["size"], meta["mtime_ns"]):
+        return True
+    if stat.st_size != meta["size"] or checksum(file_path) != meta["sha256"]:
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    write_meta(meta_path, meta)
+    return True
+
+
+def load_data(file_path):
+    """
+    (X, y) of a data file as read-only memory-mapped arrays, converting it first if the
+    cache is missing or stale. X is float32, y holds the label bytes (b"g", b"h").
+    """
+    if not is_fresh(file_path):
+        convert(file_path)
+    features_path, labels_path, _ = cache_paths(file_path)
+    X = np.load(features_path, mmap_mode="r")
+    y = np.load(labels_path, mmap_mode="r").view("S1")
+    return X, y
+
+
+def compare_load_times(file_path="train_set.txt", scales=(1, 100)):
+    """Times pd.read_csv against the memory-mapped cache on the file and on copies repeated `scales` times."""
+    import tempfile
+    import time
+
+    with open(file_path, "rb") as f:
+        text = f.read()
+    print(f"{'ROWS':>10} {'READ_CSV':>9} {'CONVERT':>9} {'FRESHNESS':>10} {'MMAP':>9} {'MMAP+SUM':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for scale in scales:
+            path = os.path.join(folder, f"x{scale}.txt")
+            with open(path, "wb") as f:
+                f.write(text * scale)
+
+            start = time.perf_counter()
+            df = pd.read_csv(path, header=None)
+            X_text = df.iloc[:, :-1].values
+            read_csv = time.perf_counter() - start
+
+            start = time.perf_counter()
+            convert(path)
+            converted = time.perf_counter() - start
+
+            start = time.perf_counter()
+            is_fresh(path)
+            freshness = time.perf_counter() - start
+
+            start = time.perf_counter()
+            X, y = load_data(path)
+            mapped = time.perf_counter() - start
+            start = time.perf_counter()
+            X.sum(axis=0), (y == b"g").sum()  # Touches every page once
+            touched = mapped + time.perf_counter() - start
+
+            assert np.allclose(X, X_text, rtol=1e-6) and len(y) == len(df)
+            print(f"{len(X):>10} {read_csv:>8.3f}s {converted:>8.3f}s {freshness * 1e3:>8.2f}ms "
+                  f"{mapped * 1e3:>7.2f}ms {touched * 1e3:>7.1f}ms")
+            del X, y
+
+
+if __name__ == "__main__":
+    compare_load_times()
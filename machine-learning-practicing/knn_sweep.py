@@ -0,0 +1,92 @@
+import numpy as np
+
+BLOCK_SIZE = 1024  # Query rows per block of the distance matrix (block x n_train floats in memory)
+
+
+def nearest_neighbors(X_train, X_query, k_max, block_size=BLOCK_SIZE):
+    """
+    Indices of the k_max nearest training points of every query row, nearest first.
+    Euclidean distances are computed one block of queries at a time, so the full
+    query x train matrix is never held in memory.
+    """
+    X_train = np.asarray(X_train, dtype=float)
+    X_query = np.asarray(X_query, dtype=float)
+    train_norms = np.einsum("ij,ij->i", X_train, X_train)
+    neighbors = np.empty((len(X_query), k_max), dtype=np.intp)
+    for start in range(0, len(X_query), block_size):
+        block = X_query[start : start + block_size]
+        # |q - t|^2 = |q|^2 + |t|^2 - 2 q.t (|q|^2 is the same along a row, so it is left out)
+        distances = train_norms - 2 * block @ X_train.T
+        nearest = np.argpartition(distances, k_max - 1, axis=1)[:, :k_max]
+        order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind="stable")
+        neighbors[start : start + block_size] = np.take_along_axis(nearest, order, axis=1)
+    return neighbors
+
+
+def predictions_for_all_k(neighbor_labels, k_values, n_classes=None):
+    """
+    Majority-vote predictions for every k from one neighbor list.
+    neighbor_labels: (n_query, k_max) class ids (0, 1, ...) of the neighbors, nearest first.
+    Returns {k: predictions}. Votes are cumulative counts per class along the neighbor
+    list, so each extra k costs one argmax; ties go to the smallest class id, as in
+    KNeighborsClassifier.
+    """
+    n_classes = n_classes or int(neighbor_labels.max()) + 1
+    one_hot = neighbor_labels[..., None] == np.arange(n_classes)
+    votes = np.cumsum(one_hot, axis=1, dtype=np.int32)
+    return {k: votes[:, k - 1].argmax(axis=1) for k in k_values}
+
+
+def sweep_k(X_train, y_train, X_val, y_val, k_values=range(1, 41)):
+    """
+    Training and validation accuracy of a uniform-weight kNN classifier for every k,
+    from a single neighbor query per set. y values are class ids (0, 1, ...).
+    Returns (best_k, train_accuracy, val_accuracy, val_predictions), the last three as
+    {k: value} dicts.
+    """
+    k_values = list(k_values)
+    k_max = max(k_values)
+    y_train, y_val = np.asarray(y_train), np.asarray(y_val)
+    n_classes = int(max(y_train.max(), y_val.max())) + 1
+
+    # The training set is scored with each point among its own neighbors, like knn.predict(X_train)
+    train_predictions = predictions_for_all_k(y_train[nearest_neighbors(X_train, X_train, k_max)], k_values, n_classes)
+    val_predictions = predictions_for_all_k(y_train[nearest_neighbors(X_train, X_val, k_max)], k_values, n_classes)
+
+    train_accuracy = {k: np.mean(train_predictions[k] == y_train) for k in k_values}
+    val_accuracy = {k: np.mean(val_predictions[k] == y_val) for k in k_values}
+    best_k = max(k_values, key=lambda k: (val_accuracy[k], -k))  # First k with the best accuracy
+    return best_k, train_accuracy, val_accuracy, val_predictions
+
+
+def compare_with_loop(k_values=range(1, 41)):
+    """Times sweep_k against refitting KNeighborsClassifier for every k, on the saved splits."""
+    import time
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.metrics import accuracy_score
+    from dataset_cache import load_data
+
+    X_train, y_train = load_data("train_set.txt")
+    X_val, y_val = load_data("validation_set.txt")
+    y_train, y_val = np.where(y_train == b"g", 1, 0), np.where(y_val == b"g", 1, 0)
+
+    start = time.perf_counter()
+    loop_train, loop_val = {}, {}
+    for k in k_values:
+        knn = KNeighborsClassifier(n_neighbors=k)
+        knn.fit(X_train, y_train)
+        loop_train[k] = accuracy_score(y_train, knn.predict(X_train))
+        loop_val[k] = accuracy_score(y_val, knn.predict(X_val))
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    best_k, train_accuracy, val_accuracy, _ = sweep_k(X_train, y_train, X_val, y_val, k_values)
+    sweep_time = time.perf_counter() - start
+
+    differences = max(max(abs(loop_train[k] - train_accuracy[k]), abs(loop_val[k] - val_accuracy[k])) for k in k_values)
+    print(f"Refit loop: {loop_time:.2f}s, single query sweep: {sweep_time:.2f}s ({loop_time / sweep_time:.1f}x faster)")
+    print(f"Best k = {best_k} (validation accuracy {val_accuracy[best_k]:.3f}), largest accuracy difference {differences:.4f}")
+
+
+if __name__ == "__main__":
+    compare_with_loop()
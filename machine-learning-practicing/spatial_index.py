@@ -0,0 +1,233 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Without Numba the query runs as plain (slow) Python."""
+        return lambda func: func
+
+LEAF_SIZE = 40  # Most points kept in one leaf (smaller: deeper tree, fewer distance computations)
+BATCH_SIZE = 4096  # Queries per task of the process pool
+FORMAT_VERSION = 1
+
+
+@njit(cache=True)
+def _query(data, node_start, node_end, node_left, node_right, node_lo, node_hi, queries, k):
+    """Exact k nearest neighbors of every query row: (squared distances, positions in data), nearest first."""
+    n_queries, dims = queries.shape
+    best_dist = np.full((n_queries, k), np.inf)
+    best_index = np.full((n_queries, k), -1, dtype=np.int64)
+    stack = np.empty(2 * 64, dtype=np.int64)  # Two entries per level; depth is ~log2(n / leaf_size)
+    for q in range(n_queries):
+        point = queries[q]
+        dist, index = best_dist[q], best_index[q]
+        top = 0
+        stack[0] = 0
+        while top >= 0:
+            node = stack[top]
+            top -= 1
+            # Smallest possible distance to the node's bounding box
+            bound = 0.0
+            for d in range(dims):
+                if point[d] < node_lo[node, d]:
+                    bound += (node_lo[node, d] - point[d]) ** 2
+                elif point[d] > node_hi[node, d]:
+                    bound += (point[d] - node_hi[node, d]) ** 2
+            if bound >= dist[k - 1]:
+                continue
+            left = node_left[node]
+            if left < 0:
+                for i in range(node_start[node], node_end[node]):
+                    total = 0.0
+                    for d in range(dims):
+                        total += (data[i, d] - point[d]) ** 2
+                    if total < dist[k - 1]:
+                        # Insert into the sorted k-best list
+                        j = k - 1
+                        while j > 0 and dist[j - 1] > total:
+                            dist[j] = dist[j - 1]
+                            index[j] = index[j - 1]
+                            j -= 1
+                        dist[j] = total
+                        index[j] = i
+                continue
+            right = node_right[node]
+            # Push the farther child first so the nearer one is searched first
+            near_left = 0.0
+            near_right = 0.0
+            for d in range(dims):
+                near_left += max(node_lo[left, d] - point[d], 0.0, point[d] - node_hi[left, d]) ** 2
+                near_right += max(node_lo[right, d] - point[d], 0.0, point[d] - node_hi[right, d]) ** 2
+            if near_left <= near_right:
+                stack[top + 1], stack[top + 2] = right, left
+            else:
+                stack[top + 1], stack[top + 2] = left, right
+            top += 2
+    return best_dist, best_index
+
+
+class KDTree:
+    """
+    KD-tree over the rows of `data`, for exact Euclidean k-nearest-neighbor queries.
+    Nodes split at the median of their widest dimension until at most `leaf_size` points
+    are left. The tree is stored as flat arrays, so it can be saved once and reloaded.
+    """
+
+    def __init__(self, data, leaf_size=LEAF_SIZE):
+        data = np.asarray(data, dtype=float)
+        self.leaf_size = leaf_size
+        order = np.arange(len(data))
+        start, end, left, right, lo, hi = [], [], [], [], [], []
+
+        def add(first, last):
+            points = data[order[first:last]]
+            start.append(first), end.append(last), left.append(-1), right.append(-1)
+            lo.append(points.min(axis=0)), hi.append(points.max(axis=0))
+            return len(start) - 1
+
+        pending = [add(0, len(data))]
+        while pending:
+            node = pending.pop()
+            first, last = start[node], end[node]
+            if last - first <= leaf_size:
+                continue
+            dim = np.argmax(hi[node] - lo[node])
+            middle = (first + last) // 2
+            section = order[first:last]
+            section[:] = section[np.argpartition(data[section, dim], middle - first)]
+            left[node], right[node] = add(first, middle), add(middle, last)
+            pending += [left[node], right[node]]
+
+        self.indices = order  # Tree position -> row of the original data
+        self.data = data[order]
+        self.node_start, self.node_end = np.array(start, dtype=np.int64), np.array(end, dtype=np.int64)
+        self.node_left, self.node_right = np.array(left, dtype=np.int64), np.array(right, dtype=np.int64)
+        self.node_lo, self.node_hi = np.array(lo), np.array(hi)
+
+    def _arrays(self):
+        return (self.data, self.node_start, self.node_end, self.node_left, self.node_right, self.node_lo, self.node_hi)
+
+    def query(self, X, k=1, workers=1, batch_size=BATCH_SIZE):
+        """
+        (distances, indices) of the k nearest rows of the original data for every row of X,
+        nearest first. With workers > 1 the queries are split into batches of `batch_size`
+        and searched in a process pool.
+        """
+        if not 1 <= k <= len(self.data):
+            raise ValueError(f"k must be between 1 and the number of points ({len(self.data)}), got {k}")
+        X = np.ascontiguousarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] != self.data.shape[1]:
+            raise ValueError(f"X must have shape (n, {self.data.shape[1]}), got {X.shape}")
+        if workers == 1 or len(X) <= batch_size:
+            squared, positions = _query(*self._arrays(), X, k)
+        else:
+            batches = [X[i : i + batch_size] for i in range(0, len(X), batch_size)]
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                results = list(pool.map(_query_batch, batches, [k] * len(batches)))
+            squared = np.concatenate([r[0] for r in results])
+            positions = np.concatenate([r[1] for r in results])
+        return np.sqrt(squared), self.indices[positions]
+
+    # --- FILE I/O ---
+    def save(self, path):
+        np.savez(path, version=FORMAT_VERSION, leaf_size=self.leaf_size, indices=self.indices,
+                 **{name: value for name, value in zip(("data", "node_start", "node_end", "node_left", "node_right",
+                                                        "node_lo", "node_hi"), self._arrays())})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            if int(saved["version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} KD-tree")
+            tree = cls.__new__(cls)
+            tree.leaf_size = int(saved["leaf_size"])
+            for name in ("indices", "data", "node_start", "node_end", "node_left", "node_right", "node_lo", "node_hi"):
+                setattr(tree, name, saved[name])
+        return tree
+
+
+# The pool's processes each get the tree once, not with every batch
+_worker_tree = None
+
+
+def _init_worker(tree):
+    global _worker_tree
+    _worker_tree = tree
+
+
+def _query_batch(X, k):
+    return _query(*_worker_tree._arrays(), X, k)
+
+
+def load_features(file_path="magic.txt"):
+    """The 10 feature columns of a MAGIC data file."""
+    from dataset_cache import load_data
+    return np.asarray(load_data(file_path)[0], dtype=float)
+
+
+def scaled_up(X, factor, rng):
+    """`factor` times as many rows: resampled rows with 1% per-feature jitter (no exact duplicates)."""
+    rows = X[rng.integers(0, len(X), len(X) * factor)]
+    return rows + rng.normal(0, 0.01, rows.shape) * X.std(axis=0)
+
+
+def check_query_shapes(tree, workers=2):
+    """Queries of the wrong width, or 1-D, raise ValueError on the single and the pooled path."""
+    dims = tree.data.shape[1]
+    for X in (np.zeros((4, dims + 1)), np.zeros((4, dims - 1)), np.zeros(dims)):
+        for n_workers in (1, workers):
+            try:
+                tree.query(X, 1, workers=n_workers, batch_size=1)
+            except ValueError:
+                continue
+            raise AssertionError(f"query accepted shape {X.shape} with {n_workers} worker(s)")
+
+
+def benchmark(scales=(1, 10, 100), queries=2000, k=10, leaf_size=LEAF_SIZE, workers=None, seed=0):
+    """Build, save/load and query times of the KD-tree against blocked brute force, on scaled-up MAGIC data."""
+    import tempfile
+    import time
+    from knn_sweep import nearest_neighbors
+
+    workers = workers or os.cpu_count()
+    rng = np.random.default_rng(seed)
+    base = load_features()
+    _query(*KDTree(base[:100], leaf_size)._arrays(), base[:1], k)  # Compile before timing
+    check_query_shapes(KDTree(base[:100], leaf_size), max(workers, 2))
+    print(f"{queries} queries, k={k}, leaf size {leaf_size}, {workers} worker process(es)")
+    print(f"{'POINTS':>10} {'BUILD':>8} {'LOAD':>8} {'TREE':>8} {'POOL':>8} {'BRUTE':>8} {'SPEEDUP':>8}  SAME")
+    for scale in scales:
+        X = base if scale == 1 else scaled_up(base, scale, rng)
+        Q = scaled_up(base, 1, rng)[:queries]
+
+        start = time.perf_counter()
+        tree = KDTree(X, leaf_size)
+        build = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "tree.npz")
+            tree.save(path)
+            start = time.perf_counter()
+            tree = KDTree.load(path)
+            load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        distances, _ = tree.query(Q, k)
+        single = time.perf_counter() - start
+        start = time.perf_counter()
+        tree.query(Q, k, workers=workers, batch_size=max(1, queries // (4 * workers)))
+        pooled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        brute = nearest_neighbors(X, Q, k, block_size=max(1, 2**25 // len(X)))
+        brute_time = time.perf_counter() - start
+        brute_distances = np.linalg.norm(X[brute] - Q[:, None, :], axis=2)
+        same = np.allclose(distances, brute_distances)
+        print(f"{len(X):>10} {build:>7.2f}s {load:>7.3f}s {single:>7.3f}s {pooled:>7.3f}s {brute_time:>7.2f}s "
+              f"{brute_time / single:>7.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    benchmark()
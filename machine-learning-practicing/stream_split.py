@@ -0,0 +1,123 @@
+import hashlib
+import random
+
+SPLIT_FILES = ("train_set.txt", "validation_set.txt", "test_set.txt")
+FRACTIONS = (0.7, 0.15, 0.15)
+RESERVOIR_SIZE = 1_000_000  # Most records kept per class while balancing (bounds memory)
+BUFFER_SIZE = 1 << 20  # Bytes buffered per input or output file
+
+
+def record_key(line, seed=0):
+    """64-bit hash of a record: decides its split and its place in the output order."""
+    digest = hashlib.blake2b(line, digest_size=8, salt=seed.to_bytes(16, "little"))
+    return int.from_bytes(digest.digest(), "little")
+
+
+def read_records(file_path):
+    """Non-empty lines of a data file as bytes (newline-terminated), read with a large buffer."""
+    with open(file_path, "rb", buffering=BUFFER_SIZE) as f:
+        for line in f:
+            if line.strip():
+                yield line if line.endswith(b"\n") else line + b"\n"
+
+
+def label_of(line):
+    return line.rstrip().rpartition(b",")[2]
+
+
+def balance(records, reservoir_size=RESERVOIR_SIZE, seed=0):
+    """
+    Equal numbers of records per class in one pass, with memory for at most
+    `reservoir_size` records per class. Every class keeps a uniform sample of its records
+    (reservoir sampling), and all of them are cut to the smallest class's count.
+    Returns (balanced records in hash order, {label: records seen}).
+    """
+    rng = random.Random(seed)
+    reservoirs, counts = {}, {}
+    for line in records:
+        label = label_of(line)
+        seen = counts[label] = counts.get(label, 0) + 1
+        reservoir = reservoirs.setdefault(label, [])
+        if len(reservoir) < reservoir_size:
+            reservoir.append(line)
+        else:
+            slot = rng.randrange(seen)
+            if slot < reservoir_size:
+                reservoir[slot] = line
+
+    per_class = min(len(reservoir) for reservoir in reservoirs.values()) if reservoirs else 0
+    balanced = []
+    for reservoir in reservoirs.values():
+        # A uniform sample of a uniform sample is still uniform
+        balanced += rng.sample(reservoir, per_class) if len(reservoir) > per_class else reservoir
+    balanced.sort(key=lambda line: record_key(line, seed))  # Deterministic shuffle
+    return balanced, counts
+
+
+def split(records, paths=SPLIT_FILES, fractions=FRACTIONS, seed=0):
+    """
+    Streams records into one file per split. A record's split follows from its hash alone,
+    so the assignment needs no memory and the same record always lands in the same file.
+    Returns the number of records written to each file.
+    """
+    bounds, total = [], 0
+    for fraction in fractions:
+        total += fraction
+        bounds.append(int(total / sum(fractions) * 2**64))
+    bounds[-1] = 2**64
+    written = [0] * len(paths)
+    files = [open(path, "wb", buffering=BUFFER_SIZE) for path in paths]
+    try:
+        for line in records:
+            key = record_key(line, seed)
+            target = next(i for i, bound in enumerate(bounds) if key < bound)
+            files[target].write(line)
+            written[target] += 1
+    finally:
+        for f in files:
+            f.close()
+    return written
+
+
+def write_records(records, path):
+    with open(path, "wb", buffering=BUFFER_SIZE) as f:
+        f.writelines(records)
+
+
+def balance_and_split(source, paths=SPLIT_FILES, fractions=FRACTIONS, balanced_path=None,
+                      reservoir_size=RESERVOIR_SIZE, seed=0):
+    """One pass over `source`: balanced classes, then the 70/15/15 split (and the balanced set if asked)."""
+    balanced, counts = balance(read_records(source), reservoir_size, seed)
+    if balanced_path:
+        write_records(balanced, balanced_path)
+    return counts, split(balanced, paths, fractions, seed)
+
+
+def measure(source="magic.txt", scale=50, reservoir_size=100_000):
+    """Throughput and peak memory of balance_and_split on `source` repeated `scale` times."""
+    import os
+    import resource
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as folder:
+        big = os.path.join(folder, "big.txt")
+        with open(source, "rb") as f:
+            text = f.read()
+        with open(big, "wb") as f:
+            for _ in range(scale):
+                f.write(text)
+        size = os.path.getsize(big)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        counts, written = balance_and_split(big, [os.path.join(folder, name) for name in SPLIT_FILES],
+                                            reservoir_size=reservoir_size)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{size / 2**20:.0f} MB, {sum(counts.values())} records in {elapsed:.1f}s ({size / 2**20 / elapsed:.1f} MB/s)")
+    print(f"Classes seen: {({label.decode(): count for label, count in counts.items()})}, written: {written}")
+    print(f"Peak memory {peak / 1024:.0f} MB (was {before / 1024:.0f} MB before), reservoir {reservoir_size} per class")
+
+
+if __name__ == "__main__":
+    measure()
@@ -1,36 +1,19 @@
+import queue
 import tkinter
-from turtle import bgcolor
+from concurrent.futures import ThreadPoolExecutor
 # from tkVideoPlayer import TkinterVideo
-from PIL import Image, ImageTk
 
-from manim import *
-import math, scipy
-from scipy.integrate import quad
+from oscillator import cdf_table # PDF, constants and the tabulated CDF per n
+from plots import PlotCache, POLL_MS # Density plots rendered on demand
 
-# Define constants
-hbar = 1 # Planck's constant divided by 2*pi
-m = 1 # Mass of the electron
-w = 1 # Angular frequency
-a = math.sqrt(hbar / m * w) # Length scale
 qn =0 
+N_MAX = 100 # Highest energy level on the slider
+DEBOUNCE_MS = 120 # Quiet time after the last slider move or keystroke before recomputing
 
-# Define PDF function
-def pdf(x):
-    n = qn
-    # n: energy level (0,1,2,...)
-    # x: position
-    N = (
-        math.sqrt(1 / (2**n * math.factorial(n))) * (1 / (math.pi * a**2)) ** 0.25
-    ) # Normalization Coefficient
-    hermite = scipy.special.eval_hermite(n, x / a) # Hermite polynomial
-    exp = math.exp(-0.5 * (x / a) ** 2) # Exponential factor
-    return (N * hermite * exp) ** 2 # returns: probability density
-
-# Define CDF function
-def cdf(x):
-    pdf_n = lambda x: pdf(x)
-    res, err = quad(pdf_n, -np.inf, x)
-    return res
+worker = ThreadPoolExecutor(max_workers=1) # Probabilities are computed off the Tk thread
+pending = None # after() id of the scheduled update
+latest = 0 # Number of the newest request; older results are dropped
+results = queue.Queue() # (request, probability) from the worker, shown by collect() on the Tk thread
 
 bg_color = '#0D0036'
 
@@ -44,7 +27,8 @@ page.configure(bg=bg_color, bd=15)
 # Code to add widgets will go here...
 page.title('Probability')
 
-img = ImageTk.PhotoImage(Image.open("0.png"))
+plots = PlotCache(page, N_MAX)
+img = plots.get(0)
 panel = tkinter.Label(page, image=img, border=0)
 #panel.pack(expand="no")
 panel.grid(row=0)
@@ -54,39 +38,66 @@ panel.grid(row=0)
 
 
 def calculate(n):
+    # Slider moved: wait until it rests, then show the plot and recompute
+    global qn
+    qn = int(n)
+    schedule(show)
+
+
+def schedule(update):
+    # One timer for slider and entries: the update always shows the current level's plot
+    global pending
+    if pending is not None:
+        page.after_cancel(pending)
+    pending = page.after(DEBOUNCE_MS, update)
+
 
-    print("n=", n)
-   
-    if n == '0':
-        img2 = ImageTk.PhotoImage(Image.open("0.png"))
-    elif n == '1':
-        img2 = ImageTk.PhotoImage(Image.open("1.png"))
-    elif n == '2':
-        img2 = ImageTk.PhotoImage(Image.open("2.png"))
-    elif n == '3':
-        img2 = ImageTk.PhotoImage(Image.open("3.png"))
-    elif n == '4':
-        img2 = ImageTk.PhotoImage(Image.open("4.png"))
-    elif n == '5':
-        img2 = ImageTk.PhotoImage(Image.open("5.png"))
-    elif n == '6':
-        img2 = ImageTk.PhotoImage(Image.open("6.png"))
+def show():
+    print("n=", qn)
+
+    img2 = plots.get(qn) # Cached, or rendered now (neighbours are pre-rendered in the background)
 
     panel.configure(image=img2)
     panel.image = img2
 
-    global qn
-    qn = int(n)
     calculatePDF()
-    #calculatePDF(int(n))
 
 
 def calculatePDF():
+    global pending, latest
+    pending = None
+    latest += 1
+    request = latest
+    worker.submit(probability, qn, x1.get(), x2.get()).add_done_callback(
+        lambda future: results.put((request, future.result())))
+
+
+def probability(n, a, b):
+    # Runs on the worker thread (building the table of a new level is the slow part)
     try:
-        p = cdf(float(x2.get()))-cdf(float(x1.get()))
-        result["text"] = "You are correct by: "+"{0:.2f}%".format(p*100)
+        return cdf_table(n).interval(float(a), float(b))
     except:
+        return None
+
+
+def collect():
+    # Tk is only touched from its own thread, so worker results are polled from here
+    while True:
+        try:
+            request, p = results.get_nowait()
+        except queue.Empty:
+            break
+        showPDF(request, p)
+    page.after(POLL_MS, collect)
+
+
+def showPDF(request, p):
+    if request != latest: # A newer input is on its way
+        return
+    if p is None:
         print(None)
+    else:
+        result["text"] = "You are correct by: "+"{0:.2f}%".format(p*100)
 
 result = tkinter.Label(page, text=' '
                          ,background=bg_color,
@@ -94,7 +105,7 @@ result = tkinter.Label(page, text=' '
                          fg="white")
 result.grid(row=0,column=3)
 
-selector = tkinter.Scale(page, label="n =" ,from_=0, to= 6, 
+selector = tkinter.Scale(page, label="n =" ,from_=0, to= N_MAX, 
                     fg="white", #label color
                     orient="horizontal",
                     activebackground= "Blue",
@@ -140,6 +151,12 @@ e2 = tkinter.Entry(page, width=5,
 e1.grid(row=3, column=2)
 e2.grid(row=3, column=4)
 
+# Recompute while typing, once the keystrokes pause
+x1.trace_add("write", lambda *args: schedule(show))
+x2.trace_add("write", lambda *args: schedule(show))
+
+page.after(POLL_MS, collect)
+
 
 
 
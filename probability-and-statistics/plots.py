@@ -0,0 +1,136 @@
+import math
+import queue
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+from oscillator import a, pdf
+
+# Plot style (same colors and size as the original manim renders)
+WIDTH, HEIGHT = 854, 480
+BACKGROUND = (12, 0, 54)
+CURVE = (131, 193, 103)
+AXES = (255, 255, 255)
+MARGIN_X, MARGIN_TOP, MARGIN_BOTTOM = 66, 150, 60
+
+CACHE_SIZE = 32 # PhotoImages kept in memory (least recently shown are dropped first)
+PRERENDER = 2 # Levels on each side of the shown one rendered in the background
+POLL_MS = 50 # How often the Tk thread picks up background renders
+
+def x_range(n):
+    # Classical turning point plus a few length scales of tail, at least -5..5
+    return max(5, math.ceil(math.sqrt(2 * n + 1) * a + 3))
+
+def nice_step(span, ticks=5):
+    # Tick spacing of 1, 2 or 5 times a power of ten, about `ticks` ticks over the span
+    raw = span / ticks
+    power = 10 ** math.floor(math.log10(raw))
+    return next(k * power for k in (1, 2, 5, 10) if k * power >= raw)
+
+def render(n, width=WIDTH, height=HEIGHT):
+    """Density plot of level n as a PIL image (safe to call off the Tk thread)."""
+    image = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=18)
+
+    x_max = x_range(n)
+    x = np.linspace(-x_max, x_max, width - 2 * MARGIN_X)
+    y = pdf(x, n)
+    y_step = nice_step(y.max())
+    y_max = y_step * math.ceil(y.max() / y_step * 1.1)
+
+    left, right = MARGIN_X, width - MARGIN_X
+    top, bottom = MARGIN_TOP, height - MARGIN_BOTTOM
+    center = (left + right) / 2
+    px = lambda value: center + value / x_max * (right - left) / 2
+    py = lambda value: bottom - value / y_max * (bottom - top)
+
+    # Axes with ticks
+    draw.line([(left, bottom), (right, bottom)], fill=AXES, width=2)
+    draw.line([(center, bottom), (center, top)], fill=AXES, width=2)
+    x_step = nice_step(2 * x_max, 10)
+    for k in range(-int(x_max // x_step), int(x_max // x_step) + 1):
+        tick = px(k * x_step)
+        draw.line([(tick, bottom - 6), (tick, bottom + 6)], fill=AXES, width=2)
+        draw.text((tick, bottom + 10), f"{k * x_step:g}", fill=AXES, font=font, anchor="mt")
+    for k in range(1, int(round(y_max / y_step)) + 1):
+        tick = py(k * y_step)
+        draw.line([(center - 6, tick), (center + 6, tick)], fill=AXES, width=2)
+        draw.text((center - 10, tick), f"{k * y_step:g}", fill=AXES, font=font, anchor="rm")
+
+    # Density curve and labels
+    draw.line(list(zip(left + np.arange(x.size), py(y))), fill=CURVE, width=3, joint="curve")
+    draw.text((width / 2, 60), "Probability density of the harmonic oscillator",
+              fill=AXES, font=ImageFont.load_default(size=30), anchor="mm")
+    draw.text((width - 30, MARGIN_TOP + 20), f"n = {n}", fill=CURVE,
+              font=ImageFont.load_default(size=32), anchor="rm")
+    return image
+
+class PlotCache:
+    """
+    PhotoImages of the density plots, created on demand and kept in an LRU.
+    A background thread renders the neighbours of the last requested level, and the
+    Tk thread converts them to PhotoImages (Tk objects must be made on its own thread).
+    """
+    def __init__(self, root, n_max, size=CACHE_SIZE, prerender=PRERENDER):
+        self.root = root
+        self.n_max = n_max
+        self.size = size
+        self.prerender = prerender
+        self.photos = OrderedDict() # n -> PhotoImage, most recently shown last
+        self.rendered = {} # n -> PIL image from the worker, not yet converted
+        self.current = 0
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+        self.root.after(POLL_MS, self._collect)
+
+    def get(self, n):
+        self.current = n
+        photo = self.photos.get(n)
+        if photo is None:
+            with self.lock:
+                image = self.rendered.pop(n, None)
+            photo = self._store(n, render(n) if image is None else image)
+        self.photos.move_to_end(n)
+        self._prerender(n)
+        return photo
+
+    def _store(self, n, image):
+        photo = self.photos[n] = ImageTk.PhotoImage(image, master=self.root)
+        while len(self.photos) > self.size:
+            self.photos.popitem(last=False)
+        return photo
+
+    def _prerender(self, n):
+        # Nearest first; the worker skips levels already done or no longer near the slider
+        for offset in range(1, self.prerender + 1):
+            for k in (n + offset, n - offset):
+                if 0 <= k <= self.n_max and k not in self.photos:
+                    self.requests.put(k)
+
+    def _work(self):
+        while True:
+            n = self.requests.get()
+            with self.lock:
+                done = n in self.rendered
+            if not done and n not in self.photos and abs(n - self.current) <= self.prerender:
+                image = render(n)
+                with self.lock:
+                    self.rendered[n] = image
+
+    def _collect(self):
+        with self.lock:
+            ready, self.rendered = self.rendered, {}
+        for n, image in ready.items():
+            if n not in self.photos:
+                self._store(n, image)
+        self.root.after(POLL_MS, self._collect)
+
+if __name__ == '__main__':
+    import time
+    for n in (0, 3, 6, 50, 500):
+        start = time.perf_counter()
+        render(n).save(f"plot_{n}.png")
+        print(f"n = {n}: {(time.perf_counter() - start) * 1000:.1f} ms")